@@ -0,0 +1,165 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import router
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import Role, User
+
+from .cache import get_cache
+
+# Поля пользователя, которые кладутся в токен и нужны для проверки прав.
+ROLE_CLAIMS = ('role', 'is_staff', 'is_superuser')
+ROLE_STATE_KEY = 'api:auth:roles:v2:{user_id}'
+LOCAL_CACHE_SIZE = 10000
+
+_local_states = {}
+_local_lock = threading.Lock()
+
+
+def access_token_for(user):
+    """Выпускает access-токен с ролью и именем пользователя."""
+    token = RefreshToken.for_user(user).access_token
+    token['username'] = user.username
+    for claim in ROLE_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def _load_role_state(user_id):
+    # Роль читается с основной базы: отстающая реплика вернула бы
+    # старую роль, и она осталась бы в кэше после сброса.
+    state = (
+        User.objects.using(router.db_for_write(User))
+        .filter(pk=user_id)
+        .values_list(*ROLE_CLAIMS, 'is_active', 'username')
+        .first()
+    )
+    return list(state) if state is not None else None
+
+
+def get_role_state(user_id):
+    """
+    Текущие роль, флаги и имя пользователя: сначала из локального кэша
+    процесса с коротким TTL, затем из общего кэша и только потом из БД.
+    Для удалённого пользователя возвращается None.
+    """
+    now = time.monotonic()
+    cached = _local_states.get(user_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    cache = get_cache()
+    key = ROLE_STATE_KEY.format(user_id=user_id)
+    state = cache.get(key)
+    if state is None:
+        state = _load_role_state(user_id)
+        # Отсутствие пользователя тоже кэшируется, чтобы токены
+        # удалённых аккаунтов не ходили в БД на каждом запросе.
+        cache.set(key, state or [], timeout=settings.JWT_ROLE_CACHE_TIMEOUT)
+    state = state or None
+
+    with _local_lock:
+        if len(_local_states) >= LOCAL_CACHE_SIZE:
+            _local_states.clear()
+        _local_states[user_id] = (now + settings.JWT_ROLE_LOCAL_TTL, state)
+    return state
+
+
+def invalidate_role_state(user_id):
+    """
+    Сбрасывает закэшированную роль пользователя. Локальные кэши других
+    процессов устаревают не позже, чем через JWT_ROLE_LOCAL_TTL секунд.
+    """
+    get_cache().delete(ROLE_STATE_KEY.format(user_id=user_id))
+    with _local_lock:
+        _local_states.pop(user_id, None)
+
+
+def clear_local_role_states():
+    with _local_lock:
+        _local_states.clear()
+
+
+def model_user(user):
+    """
+    Экземпляр User для присвоения внешнему ключу без запроса к БД:
+    хватает id и имени, которое выводят сериализаторы. Имя берётся из
+    состояния пользователя, уже прочитанного при аутентификации: в
+    токене оно остаётся прежним после переименования.
+    """
+    if isinstance(user, User):
+        return user
+    state = get_role_state(user.pk)
+    username = state[-1] if state is not None else user.username
+    instance = User(pk=user.pk, username=username)
+    instance._state.adding = False
+    return instance
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь, собранный из утверждений токена, без обращения к БД."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', Role.USER)
+
+    @property
+    def is_user(self):
+        return self.role == Role.USER
+
+    @property
+    def is_moderator(self):
+        return self.role == Role.MODERATOR
+
+    @property
+    def is_admin(self):
+        return (self.role == Role.ADMIN
+                or self.is_superuser
+                or self.is_staff
+                )
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по токену с утверждениями о роли. Вместо строки
+    пользователя из БД используется RoleTokenUser, а понижение роли,
+    блокировка или удаление аккаунта отслеживаются сравнением
+    утверждений с закэшированным состоянием пользователя.
+
+    Токены, выпущенные до появления утверждений о роли, и все токены
+    при выключенном JWT_STATELESS проверяются прежним способом —
+    загрузкой пользователя из БД.
+    """
+
+    def get_user(self, validated_token):
+        if not settings.JWT_STATELESS or not all(
+            claim in validated_token for claim in ROLE_CLAIMS
+        ):
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит идентификатор пользователя')
+
+        state = get_role_state(user_id)
+        if state is None:
+            raise AuthenticationFailed('Пользователь не найден',
+                                       code='user_not_found')
+        *roles, is_active, _ = state
+        if not is_active:
+            raise AuthenticationFailed('Пользователь заблокирован',
+                                       code='user_inactive')
+        if roles != [validated_token[claim] for claim in ROLE_CLAIMS]:
+            raise AuthenticationFailed(
+                'Роль пользователя изменилась, получите новый токен',
+                code='token_outdated'
+            )
+        return RoleTokenUser(validated_token)
@@ -0,0 +1,175 @@
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework import serializers, status
+
+from reviews.models import Category, Genre, GenreTitle, Title
+from reviews.utils import year_validate
+
+from .cache import bump_generation
+
+
+class TitleBatchItemSerializer(serializers.ModelSerializer):
+    """
+    Проверка одного произведения пачки без запросов к БД: слаги
+    категории и жанров сверяются сразу для всей пачки.
+    """
+
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+    year = serializers.IntegerField(validators=[year_validate])
+
+    class Meta:
+        model = Title
+        fields = ('name', 'year', 'description', 'category', 'genre')
+
+
+class GenreLinkSerializer(serializers.Serializer):
+    title = serializers.IntegerField()
+    genre = serializers.SlugField()
+
+
+def slug_ids(model, slugs):
+    """Идентификаторы объектов по слагам одним запросом."""
+    return dict(
+        model.objects.filter(slug__in=set(slugs)).values_list('slug', 'id')
+    )
+
+
+def validate_items(serializer_class, items):
+    """Возвращает проверенные данные и ошибки по индексу элемента."""
+    if not isinstance(items, list):
+        raise serializers.ValidationError('Ожидается список объектов')
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise serializers.ValidationError(
+            f'В пачке не больше {settings.BATCH_MAX_ITEMS} объектов'
+        )
+    validated, errors = {}, {}
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            validated[index] = serializer.validated_data
+        else:
+            errors[index] = serializer.errors
+    return validated, errors
+
+
+def batch_response_status(results):
+    """201 — всё создано, 400 — ничего, 207 — часть элементов с ошибками."""
+    created = sum('errors' not in result for result in results)
+    if created == len(results):
+        return status.HTTP_201_CREATED
+    if not created:
+        return status.HTTP_400_BAD_REQUEST
+    return status.HTTP_207_MULTI_STATUS
+
+
+def insert_titles(titles):
+    """
+    Вставляет произведения пачкой. SQLite в Django 3.2 не возвращает
+    ключи из bulk_create, поэтому там строки сохраняются по одной.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Title.objects.bulk_create(titles)
+    for title in titles:
+        title.save(force_insert=True)
+    return titles
+
+
+def create_titles(items):
+    """
+    Создаёт пачку произведений: все слаги разрешаются двумя запросами,
+    произведения и связи с жанрами вставляются через bulk_create.
+    Возвращает результат по каждому элементу в исходном порядке.
+    """
+    validated, errors = validate_items(TitleBatchItemSerializer, items)
+    categories = slug_ids(
+        Category, (data['category'] for data in validated.values())
+    )
+    genres = slug_ids(
+        Genre,
+        (slug for data in validated.values() for slug in data['genre'])
+    )
+    for index, data in list(validated.items()):
+        item_errors = {}
+        if data['category'] not in categories:
+            item_errors['category'] = [
+                f'Категория {data["category"]} не найдена'
+            ]
+        unknown = [slug for slug in data['genre'] if slug not in genres]
+        if unknown:
+            item_errors['genre'] = [
+                f'Жанры не найдены: {", ".join(unknown)}'
+            ]
+        if item_errors:
+            errors[index] = item_errors
+            del validated[index]
+
+    with transaction.atomic():
+        titles = insert_titles([
+            Title(
+                name=data['name'],
+                year=data['year'],
+                description=data.get('description', ''),
+                category_id=categories[data['category']],
+            )
+            for data in validated.values()
+        ])
+        created = dict(zip(validated, titles))
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title_id=created[index].id, genre_id=genres[slug])
+            for index, data in validated.items()
+            for slug in dict.fromkeys(data['genre'])
+        )
+        if created:
+            transaction.on_commit(lambda: bump_generation('titles'))
+
+    return [
+        {'id': created[index].id} if index in created
+        else {'errors': errors[index]}
+        for index in range(len(items))
+    ]
+
+
+def link_genres(items):
+    """
+    Добавляет пачку связей произведение-жанр. Жанры, произведения и уже
+    существующие связи проверяются по одному запросу; имеющиеся связи
+    не дублируются.
+    """
+    validated, errors = validate_items(GenreLinkSerializer, items)
+    genres = slug_ids(Genre, (data['genre'] for data in validated.values()))
+    title_ids = set(
+        Title.objects.filter(
+            pk__in={data['title'] for data in validated.values()}
+        ).values_list('id', flat=True)
+    )
+    existing = set(
+        GenreTitle.objects.filter(
+            title_id__in=title_ids, genre_id__in=genres.values()
+        ).values_list('title_id', 'genre_id')
+    )
+    results = []
+    links = {}
+    for index in range(len(items)):
+        if index in errors:
+            results.append({'errors': errors[index]})
+            continue
+        data = validated[index]
+        item_errors = {}
+        if data['title'] not in title_ids:
+            item_errors['title'] = [f'Произведение {data["title"]} не найдено']
+        if data['genre'] not in genres:
+            item_errors['genre'] = [f'Жанр {data["genre"]} не найден']
+        if item_errors:
+            results.append({'errors': item_errors})
+            continue
+        pair = (data['title'], genres[data['genre']])
+        results.append({'created': pair not in existing and pair not in links})
+        links.setdefault(pair, GenreTitle(title_id=pair[0], genre_id=pair[1]))
+
+    new_links = [link for pair, link in links.items() if pair not in existing]
+    with transaction.atomic():
+        GenreTitle.objects.bulk_create(new_links)
+        if new_links:
+            transaction.on_commit(lambda: bump_generation('titles'))
+    return results
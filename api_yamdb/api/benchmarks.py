@@ -0,0 +1,207 @@
+import json
+import os
+import time
+from collections import namedtuple
+from contextlib import ExitStack
+from itertools import count
+
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection, connections
+from django.test import Client
+
+from reviews.models import Genre, Review, Title, User
+
+from .authentication import access_token_for
+from .cache import bump_generation
+from .metrics import QueryTracker
+from .utils import percentile
+
+# Сценарий: имя и фабрика, которая по данным набора возвращает функцию
+# подготовки запроса. Подготовка выполняется вне замера и возвращает
+# аргументы для Client: метод, путь и именованные параметры.
+Scenario = namedtuple('Scenario', ('name', 'factory'))
+
+
+def titles_list(dataset, cached=False):
+    filters = [
+        {'genre': slug, 'year': year}
+        for slug in dataset['genres'] for year in dataset['years']
+    ]
+    if cached:
+        # Один и тот же запрос: после прогрева ответ берётся из кэша.
+        filters = filters[:1]
+
+    def prepare(index):
+        if not cached:
+            bump_generation('titles')
+        data = filters[index % len(filters)]
+        return 'get', '/api/v1/titles/', {'data': data}
+    return prepare
+
+
+def reviews_list(dataset):
+    def prepare(index):
+        title_id = dataset['titles'][index % len(dataset['titles'])]
+        return 'get', f'/api/v1/titles/{title_id}/reviews/', {}
+    return prepare
+
+
+def comment_create(dataset):
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {dataset["token"]}'}
+
+    def prepare(index):
+        title_id, review_id = dataset['reviews'][
+            index % len(dataset['reviews'])
+        ]
+        return 'post', (
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        ), {'data': {'text': f'Комментарий {index}'},
+            'content_type': 'application/json', **headers}
+    return prepare
+
+
+def signup(dataset):
+    numbers = count()
+
+    def prepare(index):
+        number = next(numbers)
+        return 'post', '/api/v1/auth/signup/', {'data': {
+            'username': f'bench{number}',
+            'email': f'bench{number}@yamdb.fake',
+        }, 'content_type': 'application/json'}
+    return prepare
+
+
+def token(dataset):
+    user = User.objects.get(pk=dataset['user'])
+
+    def prepare(index):
+        return 'post', '/api/v1/auth/token/', {'data': {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        }, 'content_type': 'application/json'}
+    return prepare
+
+
+SCENARIOS = (
+    Scenario('titles-list', titles_list),
+    Scenario('titles-list-cached',
+             lambda dataset: titles_list(dataset, cached=True)),
+    Scenario('reviews-list', reviews_list),
+    Scenario('comment-create', comment_create),
+    Scenario('signup', signup),
+    Scenario('token', token),
+)
+
+
+def describe_dataset():
+    """Идентификаторы из базы, по которым сценарии строят запросы."""
+    user = User.objects.order_by('pk').first()
+    return {
+        'user': user.pk,
+        'token': str(access_token_for(user)),
+        'genres': list(Genre.objects.values_list('slug', flat=True)[:5]),
+        'years': list(
+            Title.objects.values_list('year', flat=True).distinct()[:5]
+        ),
+        'titles': list(Title.objects.values_list('pk', flat=True)[:50]),
+        'reviews': list(
+            Review.objects.values_list('title_id', 'pk')[:50]
+        ),
+    }
+
+
+def measure(client, prepare, iterations, warmup):
+    """
+    Выполняет warmup запросов без учёта и iterations с замером. SQL
+    считается обёрткой выполнения на всех подключениях.
+    """
+    latencies, queries, errors = [], [], 0
+    total = 0.0
+    for index in range(warmup + iterations):
+        method, path, kwargs = prepare(index)
+        tracker = QueryTracker()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(tracker)
+                )
+            started = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs)
+            elapsed = time.perf_counter() - started
+        if index < warmup:
+            continue
+        errors += response.status_code >= 400
+        total += elapsed
+        latencies.append(elapsed)
+        queries.append(tracker.count)
+    return {
+        'p50': percentile(latencies, 0.50) * 1000,
+        'p95': percentile(latencies, 0.95) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+        'queries': sum(queries) / len(queries),
+        'rps': iterations / total if total else 0.0,
+        'errors': errors,
+    }
+
+
+def run_benchmarks(scenarios=SCENARIOS, iterations=100, warmup=10):
+    dataset = describe_dataset()
+    client = Client()
+    return {
+        scenario.name: measure(
+            client, scenario.factory(dataset), iterations, warmup
+        )
+        for scenario in scenarios
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Регрессии относительно сохранённого прогона: рост числа SQL-запросов
+    и рост p50/p95 больше чем в 1 + threshold раз. Прогон на другой
+    СУБД несравним с базовым, и это ошибка, а не пропуск проверки.
+    """
+    if baseline.get('vendor') != connection.vendor:
+        raise ValueError(
+            f'Baseline was recorded on {baseline.get("vendor")}, '
+            f'this run uses {connection.vendor}.'
+        )
+    regressions = []
+    for name, result in results.items():
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries'] + 0.01:
+            regressions.append(
+                f'{name}: {result["queries"]:.2f} queries per request, '
+                f'baseline {base["queries"]:.2f}'
+            )
+        for key in ('p50', 'p95'):
+            if result[key] > base[key] * (1 + threshold):
+                regressions.append(
+                    f'{name}: {key} {result[key]:.1f} ms, '
+                    f'baseline {base[key]:.1f} ms'
+                )
+    return regressions
+
+
+def baseline_path(path):
+    """Базовый прогон хранится отдельно для каждой СУБД."""
+    return path.format(vendor=connection.vendor)
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path, results, dataset):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(
+            {'vendor': connection.vendor, 'dataset': dataset,
+             'scenarios': results},
+            baseline_file, indent=2, sort_keys=True
+        )
+        baseline_file.write('\n')
@@ -0,0 +1,122 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+GENERATION_KEY = 'api:generation:{resource}'
+RESPONSE_KEY = 'api:response:{resource}:{generation}:{digest}'
+STATS_KEY = 'api:stats:{resource}:{outcome}'
+HIT = 'hits'
+MISS = 'misses'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_generation(resource):
+    """
+    Возвращает текущее поколение ресурса. Если ключ вытеснен из кэша,
+    поколение создаётся заново из текущего времени, поэтому старые
+    закэшированные страницы не могут совпасть с новым ключом.
+    """
+    cache = get_cache()
+    key = GENERATION_KEY.format(resource=resource)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)
+    return generation
+
+
+def bump_generation(*resources):
+    """Делает недействительными все закэшированные страницы ресурсов."""
+    generation = time.time_ns()
+    get_cache().set_many(
+        {
+            GENERATION_KEY.format(resource=resource): generation
+            for resource in resources
+        },
+        timeout=None
+    )
+
+
+# Поколения всех отзывов и всех комментариев. Их сдвигает массовая
+# загрузка, которая не знает, у каких родителей изменились списки.
+ALL_REVIEWS = 'reviews'
+ALL_COMMENTS = 'comments'
+
+
+def reviews_resource(title_id):
+    """Ресурс отзывов одного произведения."""
+    return f'reviews:{title_id}'
+
+
+def comments_resource(review_id):
+    """Ресурс комментариев одного отзыва."""
+    return f'comments:{review_id}'
+
+
+def response_validators(resources, request):
+    """
+    ETag и время последнего изменения ответа по поколениям ресурсов.
+    Поколение — время изменения в наносекундах, поэтому валидаторы
+    вычисляются без обращения к БД и сериализации.
+    """
+    generations = [get_generation(resource) for resource in resources]
+    variant = (
+        f'{request.path}?{normalize_query(request)}'
+        f'|{request.accepted_renderer.format}'
+        f'|{":".join(map(str, generations))}'
+    )
+    etag = f'W/"{hashlib.md5(variant.encode()).hexdigest()}"'
+    return etag, max(generations) // 10 ** 9
+
+
+def normalize_query(request):
+    """Приводит параметры запроса к каноническому порядку."""
+    return urlencode(sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    ))
+
+
+def response_cache_key(resource, request):
+    """
+    Ключ ответа зависит от хоста и пути (они попадают в ссылки пагинации),
+    нормализованной строки запроса и поколения ресурса.
+    """
+    location = f'{request.get_host()}{request.path}?{normalize_query(request)}'
+    return RESPONSE_KEY.format(
+        resource=resource,
+        generation=get_generation(resource),
+        digest=hashlib.md5(location.encode()).hexdigest(),
+    )
+
+
+def record(resource, outcome):
+    """Увеличивает счётчик попаданий или промахов кэша ресурса."""
+    cache = get_cache()
+    key = STATS_KEY.format(resource=resource, outcome=outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def cache_stats(resources):
+    """Возвращает счётчики попаданий и промахов по ресурсам."""
+    cache = get_cache()
+    return {
+        resource: {
+            outcome: cache.get(
+                STATS_KEY.format(resource=resource, outcome=outcome), 0
+            )
+            for outcome in (HIT, MISS)
+        }
+        for resource in resources
+    }
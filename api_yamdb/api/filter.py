@@ -6,6 +6,9 @@ class TitleFilter(FilterSet):
     genre = CharFilter(field_name='genre__slug', lookup_expr='icontains')
     category = CharFilter(field_name='category__slug', lookup_expr='icontains')
     name = CharFilter(field_name='name', lookup_expr='icontains')
+    # Точные варианты используют уникальный индекс по slug.
+    genre_slug = CharFilter(field_name='genre__slug')
+    category_slug = CharFilter(field_name='category__slug')
 
     class Meta:
         model = Title
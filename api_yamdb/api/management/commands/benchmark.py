@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.test.utils import (override_settings, setup_databases,
+                               setup_test_environment,
+                               teardown_databases,
+                               teardown_test_environment)
+
+from api.benchmarks import (SCENARIOS, baseline_path, compare,
+                            load_baseline, run_benchmarks, save_baseline)
+from reviews.dataset import DatasetSize, seed_dataset
+
+# Отдельный кэш в памяти: прогон не читает и не сдвигает поколения
+# общего кэша рабочего окружения.
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    }
+}
+
+
+class Command(BaseCommand):
+    """Класс замера основных эндпоинтов API на синтетических данных"""
+
+    help = (
+        "Benchmark API hot paths on a seeded test database and compare "
+        "the results with a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        for field, default in DatasetSize._field_defaults.items():
+            parser.add_argument(f'--{field}', type=int, default=default)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            choices=[scenario.name for scenario in SCENARIOS],
+            help='Scenario to run, may be repeated. Default: all.'
+        )
+        parser.add_argument(
+            '--baseline',
+            default=settings.BENCHMARK_BASELINE,
+            help=('Path of the stored baseline JSON, {vendor} is replaced '
+                  'with the database vendor.')
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Store this run as the new baseline.'
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Fail if results regress against the baseline.'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=settings.BENCHMARK_THRESHOLD,
+            help='Allowed relative latency growth, e.g. 0.25 for 25%%.'
+        )
+
+    def handle(self, *args, **options):
+        size = DatasetSize(**{
+            field: options[field] for field in DatasetSize._fields
+        })
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['scenarios']
+            or scenario.name in options['scenarios']
+        ]
+        setup_test_environment()
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                databases = setup_databases(
+                    verbosity=0, interactive=False, aliases={'default'}
+                )
+                try:
+                    seed_dataset(size, seed=options['seed'])
+                    results = run_benchmarks(
+                        scenarios, options['iterations'], options['warmup']
+                    )
+                    self.finish(results, size, options)
+                finally:
+                    teardown_databases(databases, verbosity=0)
+        finally:
+            teardown_test_environment()
+
+    def finish(self, results, size, options):
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name}: p50 {result["p50"]:.1f} ms, '
+                f'p95 {result["p95"]:.1f} ms, p99 {result["p99"]:.1f} ms, '
+                f'{result["queries"]:.1f} queries, '
+                f'{result["rps"]:.0f} req/s, errors {result["errors"]}'
+            )
+        path = baseline_path(options['baseline'])
+        if options['compare']:
+            try:
+                baseline = load_baseline(path)
+            except FileNotFoundError:
+                raise CommandError(
+                    f'Baseline {path} not found, '
+                    'run with --save-baseline first.'
+                )
+            if baseline.get('dataset') != size._asdict():
+                self.stdout.write(self.style.WARNING(
+                    'Dataset size differs from the baseline run.'
+                ))
+            try:
+                regressions = compare(
+                    results, baseline, options['threshold']
+                )
+            except ValueError as error:
+                raise CommandError(error)
+            if regressions:
+                raise CommandError(
+                    'Regressions against baseline:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+        if options['save_baseline']:
+            save_baseline(path, results, size._asdict())
+            self.stdout.write(self.style.SUCCESS(
+                f'Baseline saved to {path}'
+            ))
@@ -0,0 +1,47 @@
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+
+def timed_queries(connection, iterations, reconnect):
+    """Время одного запроса с новым соединением или с повторным."""
+    timings = []
+    connection.close()
+    for _ in range(iterations):
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        if reconnect:
+            connection.close()
+        timings.append(time.perf_counter() - started)
+    connection.close()
+    return timings
+
+
+class Command(BaseCommand):
+    """Класс замера стоимости установки соединения с БД"""
+
+    help = (
+        "Compare a query on a fresh connection per request (CONN_MAX_AGE=0) "
+        "with a query on a reused persistent connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        for name, reconnect in (('new connection', True),
+                                ('reused connection', False)):
+            timings = timed_queries(
+                connection, options['iterations'], reconnect
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: mean {statistics.mean(timings) * 1000:.2f} ms, '
+                f'p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:.2f}'
+                ' ms'
+            ))
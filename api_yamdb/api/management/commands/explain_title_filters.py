@@ -0,0 +1,65 @@
+import re
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from api.filter import TitleFilter
+from reviews.models import Title
+
+FILTER_CASES = (
+    ('name', {'name': 'ночь'}),
+    ('year', {'year': '2000'}),
+    ('genre', {'genre': 'drama'}),
+    ('genre_slug', {'genre_slug': 'drama'}),
+    ('category', {'category': 'movie'}),
+    ('category_slug', {'category_slug': 'movie'}),
+)
+COST_RE = re.compile(r'cost=[\d.]+\.\.([\d.]+)')
+
+
+class Command(BaseCommand):
+    """Класс сравнения планов запросов фильтров произведений"""
+
+    help = "Comparing query plans of TitleFilter lookups"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE (PostgreSQL only).'
+        )
+
+    def handle(self, *args, **options):
+        postgres = connection.vendor == 'postgresql'
+        explain_options = {'analyze': True} if (
+            postgres and options['analyze']) else {}
+        for label, params in FILTER_CASES:
+            queryset = TitleFilter(
+                params, queryset=Title.objects.order_by('id')
+            ).qs
+            plan = queryset.explain(**explain_options)
+            if postgres:
+                baseline = self.explain_without_indexes(
+                    queryset, explain_options
+                )
+                self.stdout.write(
+                    f'{label}: cost {self.cost(baseline)} without indexes, '
+                    f'{self.cost(plan)} with indexes'
+                )
+            else:
+                self.stdout.write(f'{label}:')
+            if options['verbosity'] > 1 or not postgres:
+                self.stdout.write(plan)
+
+    def explain_without_indexes(self, queryset, explain_options):
+        """План того же запроса, когда планировщику запрещены индексы."""
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_indexscan = off')
+                cursor.execute('SET LOCAL enable_bitmapscan = off')
+                cursor.execute('SET LOCAL enable_indexonlyscan = off')
+            return queryset.explain(**explain_options)
+
+    def cost(self, plan):
+        match = COST_RE.search(plan)
+        return match.group(1) if match else '?'
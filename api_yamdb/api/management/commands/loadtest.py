@@ -0,0 +1,142 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+from django.core.management import BaseCommand, CommandError
+
+from api.utils import percentile
+
+DEFAULT_PATHS = ('/api/v1/titles/',)
+STARTUP_TIMEOUT = 30
+
+
+def fetch(url, headers):
+    started = time.perf_counter()
+    try:
+        with urlopen(Request(url, headers=headers), timeout=30) as response:
+            response.read()
+            ok = response.status < 400
+    except (URLError, OSError):
+        ok = False
+    return ok, time.perf_counter() - started
+
+
+def run_load(base_url, paths, requests, concurrency, headers):
+    """Отправляет requests запросов в concurrency потоков."""
+    urls = [base_url + paths[index % len(paths)] for index in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda url: fetch(url, headers), urls))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for ok, latency in results if ok]
+    return {
+        'rps': len(results) / elapsed,
+        'errors': sum(not ok for ok, _ in results),
+        'p50': percentile(latencies, 0.50) * 1000,
+        'p95': percentile(latencies, 0.95) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def wait_for_port(port, process):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError('gunicorn exited during startup')
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.2)
+    raise CommandError(f'gunicorn did not open port {port}')
+
+
+class Command(BaseCommand):
+    """Класс нагрузочного сравнения режимов воркеров gunicorn"""
+
+    help = (
+        "Load test the API. With --modes, starts gunicorn in each "
+        "SERVER_MODE from gunicorn.conf.py and compares them. "
+        "Run from the directory with manage.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://127.0.0.1:8000',
+            help='Server to load when --modes is not given.'
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help='Endpoint path, may be repeated.'
+        )
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument(
+            '--token',
+            help='JWT access token sent as a Bearer header.'
+        )
+        parser.add_argument(
+            '--modes',
+            help='Comma-separated SERVER_MODE values, e.g. sync,threads,asgi.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='GUNICORN_WORKERS for servers started by --modes.'
+        )
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Bearer {options["token"]}'
+        load = (paths, options['requests'], options['concurrency'], headers)
+
+        if not options['modes']:
+            self.report(options['url'], run_load(options['url'], *load))
+            return
+        for mode in options['modes'].split(','):
+            with self.server(mode, options['workers'], options['port']):
+                base_url = f'http://127.0.0.1:{options["port"]}'
+                # Прогрев: соединения с БД и импорт модулей в воркерах.
+                run_load(base_url, paths, options['workers'] * 4,
+                         options['workers'], headers)
+                self.report(mode, run_load(base_url, *load))
+
+    @contextmanager
+    def server(self, mode, workers, port):
+        env = dict(
+            os.environ,
+            SERVER_MODE=mode,
+            GUNICORN_WORKERS=str(workers),
+            GUNICORN_BIND=f'127.0.0.1:{port}',
+        )
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port, process)
+            yield process
+        finally:
+            process.terminate()
+            process.wait()
+
+    def report(self, name, result):
+        self.stdout.write(self.style.SUCCESS(
+            f'{name}: {result["rps"]:.1f} req/s, '
+            f'p50 {result["p50"]:.1f} ms, p95 {result["p95"]:.1f} ms, '
+            f'p99 {result["p99"]:.1f} ms, errors {result["errors"]}'
+        ))
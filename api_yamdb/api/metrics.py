@@ -0,0 +1,247 @@
+import logging
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+from .cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+SLOTS_KEY = 'api:metrics:slots'
+WORKER_KEY = 'api:metrics:worker:{slot}'
+OWNER_KEY = 'api:metrics:owner:{slot}'
+PREFIX = 'yamdb'
+UNMATCHED = 'unmatched'
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Гистограммы: имя -> (верхние границы корзин, описание).
+HISTOGRAMS = {
+    'request_seconds': (SECONDS, 'Время обработки запроса'),
+    'serialize_seconds': (
+        SECONDS, 'Время построения данных сериализатором'
+    ),
+    'render_seconds': (SECONDS, 'Время кодирования ответа рендерером'),
+    'response_bytes': (
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576),
+        'Размер тела ответа'
+    ),
+    'db_queries': (
+        (1, 2, 3, 5, 10, 20, 50, 100, 200),
+        'SQL-запросов за запрос (выборочно)'
+    ),
+    'db_seconds': (SECONDS, 'Время SQL-запросов за запрос (выборочно)'),
+}
+COUNTERS = {
+    'duplicate_query_requests_total': (
+        'Запросы с повторяющимся SQL (выборочно)'
+    ),
+}
+
+
+class MetricsRegistry:
+    """
+    Накопленные метрики процесса по имени маршрута. Гистограмма
+    хранится списком: счётчики корзин, затем сумма и количество.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = Counter()
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def observe(self, metric, route, value):
+        buckets = HISTOGRAMS[metric][0]
+        with self.lock:
+            histogram = self.histograms.get((metric, route))
+            if histogram is None:
+                histogram = self.histograms[(metric, route)] = (
+                    [0] * (len(buckets) + 3)
+                )
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def increment(self, metric, route, amount=1):
+        with self.lock:
+            self.counters[(metric, route)] += amount
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'histograms': {
+                    key: list(values)
+                    for key, values in self.histograms.items()
+                },
+                'counters': dict(self.counters),
+            }
+
+
+registry = MetricsRegistry()
+_published = {'at': 0.0}
+_slot = {'number': None}
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def worker_slot(cache):
+    """
+    Номер слота снимка этого процесса. Слоты выдаёт атомарный счётчик
+    кэша (incr), поэтому одновременно стартовавшие воркеры не затирают
+    друг друга. Владелец слота записан рядом: если счётчик вытеснен или
+    сброшен и слот достался другому процессу (или процесс — потомок
+    fork), слот выдаётся заново.
+    """
+    worker = worker_id()
+    number = _slot['number']
+    if number is not None:
+        owner_key = OWNER_KEY.format(slot=number)
+        current = cache.get_many([SLOTS_KEY, owner_key])
+        if (current.get(owner_key) == worker
+                and current.get(SLOTS_KEY, 0) >= number):
+            return number
+    cache.add(SLOTS_KEY, 0, timeout=None)
+    number = _slot['number'] = cache.incr(SLOTS_KEY)
+    cache.set(OWNER_KEY.format(slot=number), worker, timeout=None)
+    return number
+
+
+def publish(force=False):
+    """
+    Раз в METRICS_FLUSH_INTERVAL секунд кладёт снимок метрик процесса
+    в его слот общего кэша, чтобы /metrics любого воркера отдавал сумму
+    по всем. Снимок воркера, который перестал обновлять его, истекает.
+    Без общего кэша публиковать некуда.
+    """
+    if not settings.CACHE_SHARED:
+        return
+    now = time.monotonic()
+    if not force and now - _published['at'] < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _published['at'] = now
+    cache = get_cache()
+    cache.set(
+        WORKER_KEY.format(slot=worker_slot(cache)),
+        registry.snapshot(),
+        timeout=settings.METRICS_WORKER_TIMEOUT
+    )
+
+
+def collect():
+    """
+    Сумма снимков всех живых воркеров. Без общего кэша — метрики
+    только этого процесса.
+    """
+    if not settings.CACHE_SHARED:
+        snapshots = [registry.snapshot()]
+    else:
+        publish(force=True)
+        cache = get_cache()
+        slots = cache.get(SLOTS_KEY) or 0
+        snapshots = cache.get_many([
+            WORKER_KEY.format(slot=slot) for slot in range(1, slots + 1)
+        ]).values()
+    histograms, counters = {}, Counter()
+    for snapshot in snapshots:
+        for key, values in snapshot['histograms'].items():
+            total = histograms.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+        counters.update(snapshot['counters'])
+    return histograms, counters
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def exposition(histograms, counters):
+    """Метрики в текстовом формате Prometheus."""
+    lines = []
+    for metric, (buckets, description) in HISTOGRAMS.items():
+        name = f'{PREFIX}_{metric}'
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} histogram')
+        for (key, route), values in sorted(histograms.items()):
+            if key != metric:
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), values):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{route="{route}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(
+                f'{name}_sum{{route="{route}"}} {format_value(values[-2])}'
+            )
+            lines.append(f'{name}_count{{route="{route}"}} {values[-1]}')
+    for metric, description in COUNTERS.items():
+        name = f'{PREFIX}_{metric}'
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} counter')
+        for (key, route), value in sorted(counters.items()):
+            if key == metric:
+                lines.append(f'{name}{{route="{route}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data.encode(self.charset)
+
+
+class QueryTracker:
+    """
+    Обёртка выполнения SQL (connection.execute_wrapper): считает
+    запросы, их время и одинаковый текст SQL для поиска N+1.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        """SQL, выполненный не меньше METRICS_DUPLICATE_THRESHOLD раз."""
+        return {
+            sql: count for sql, count in self.statements.items()
+            if count >= settings.METRICS_DUPLICATE_THRESHOLD
+        }
+
+
+def record_queries(route, tracker):
+    registry.observe('db_queries', route, tracker.count)
+    registry.observe('db_seconds', route, tracker.seconds)
+    duplicates = tracker.duplicates()
+    if duplicates:
+        registry.increment('duplicate_query_requests_total', route)
+        sql, count = max(duplicates.items(), key=lambda item: item[1])
+        logger.warning(
+            'Повторяющийся SQL в %s (%d раз): %s', route, count, sql[:200]
+        )
@@ -0,0 +1,123 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .metrics import (UNMATCHED, QueryTracker, publish, record_queries,
+                      registry)
+from .routers import replica_reads
+
+
+class MetricsMiddleware:
+    """
+    Метрики запросов по имени маршрута: время обработки, построения
+    данных сериализатором (SerializationTimingMixin), рендеринга и
+    размер ответа. Для доли METRICS_SAMPLE_RATE запросов SQL проходит
+    через обёртку выполнения: считаются запросы, их время и повторы
+    одного SQL (признак N+1). Экспорт — /metrics.
+    """
+
+    excluded_routes = ('metrics',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        tracker = None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            if random.random() < settings.METRICS_SAMPLE_RATE:
+                tracker = QueryTracker()
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(tracker))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = match.view_name if match else UNMATCHED
+        if route in self.excluded_routes:
+            return response
+        registry.observe('request_seconds', route, elapsed)
+        for metric in ('serialize_seconds', 'render_seconds'):
+            seconds = getattr(request, f'_metrics_{metric}', None)
+            if seconds is not None:
+                registry.observe(metric, route, seconds)
+        if not response.streaming:
+            registry.observe('response_bytes', route, len(response.content))
+        if tracker is not None:
+            record_queries(route, tracker)
+        publish()
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответы DRF рендерятся после представления: засекаем рендеринг.
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._metrics_render_seconds = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class ConnectionHealthCheckMiddleware:
+    """
+    Проверяет постоянные соединения с БД перед повторным использованием.
+    Соединение, простоявшее дольше DB_HEALTH_CHECK_IDLE секунд, пингуется
+    и закрывается, если сервер его оборвал: тогда запрос откроет новое
+    вместо ошибки на первом SQL-запросе. Недавно использованные
+    соединения не проверяются, чтобы не тратить лишний round-trip.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        now = time.monotonic()
+        for connection in connections.all():
+            if connection.connection is None:
+                continue
+            last_used = getattr(connection, 'last_used', now)
+            if (now - last_used >= settings.DB_HEALTH_CHECK_IDLE
+                    and not connection.is_usable()):
+                connection.close()
+        try:
+            return self.get_response(request)
+        finally:
+            finished = time.monotonic()
+            for connection in connections.all():
+                connection.last_used = finished
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Пускает чтение безопасных запросов на реплики. После записи клиент
+    получает cookie, и в течение DATABASE_STICKY_SECONDS его запросы
+    читают с основной базы, чтобы видеть собственные изменения, даже
+    если реплика отстаёт. Клиенты без cookie могут передать заголовок
+    X-Read-Primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in SAFE_METHODS
+        sticky = (settings.DATABASE_STICKY_COOKIE in request.COOKIES
+                  or 'HTTP_X_READ_PRIMARY' in request.META)
+        with replica_reads(safe and not sticky):
+            response = self.get_response(request)
+        if not safe and response.status_code < 400:
+            response.set_cookie(
+                settings.DATABASE_STICKY_COOKIE,
+                '1',
+                max_age=settings.DATABASE_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,178 @@
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import (HIT, MISS, get_cache, get_generation, record,
+                    response_cache_key, response_validators)
+from .routers import replica_reads
+
+
+def read_primary_after_change(resources):
+    """
+    Пока поколение ресурса моложе DATABASE_STICKY_SECONDS, реплика может
+    ещё не получить изменение. Ответ с неё попал бы в кэш и валидаторы
+    под новым поколением и оставался бы устаревшим до следующей записи,
+    поэтому в это окно чтение идёт с основной базы.
+    """
+    changed = max(get_generation(resource) for resource in resources)
+    window = settings.DATABASE_STICKY_SECONDS * 10 ** 9
+    if time.time_ns() - changed < window:
+        return replica_reads(False)
+    return nullcontext()
+
+
+class QueryPlanMixin:
+    """
+    Применяет к queryset вьюсета план загрузки связанных данных,
+    выбранный по текущему действию (list, retrieve и т.д.).
+    """
+
+    query_plans = {}
+
+    def apply_query_plan(self, queryset):
+        plan = self.query_plans.get(self.action)
+        if plan is None:
+            return queryset
+        return plan(queryset)
+
+    def get_queryset(self):
+        return self.apply_query_plan(super().get_queryset())
+
+
+class SerializationTimingMixin:
+    """
+    Засекает построение serializer.data: время to_representation
+    сериализатора вьюхи попадает в метрику serialize_seconds отдельно
+    от рендеринга JSON.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        request = getattr(self.request, '_request', None)
+        if request is None:
+            return serializer
+        to_representation = serializer.to_representation
+
+        def timed(instance):
+            started = time.perf_counter()
+            try:
+                return to_representation(instance)
+            finally:
+                request._metrics_serialize_seconds = getattr(
+                    request, '_metrics_serialize_seconds', 0.0
+                ) + time.perf_counter() - started
+
+        serializer.to_representation = timed
+        return serializer
+
+
+class CachedListMixin:
+    """
+    Кэширует ответ list по нормализованной строке запроса и поколению
+    ресурса cache_resource. Поколение сдвигается сигналами моделей.
+    """
+
+    cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        key = response_cache_key(self.cache_resource, request)
+        cache = get_cache()
+        data = cache.get(key)
+        if data is not None:
+            record(self.cache_resource, HIT)
+            return Response(data, headers={'X-Cache': 'HIT'})
+        with read_primary_after_change((self.cache_resource,)):
+            response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        record(self.cache_resource, MISS)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class NestedParentMixin:
+    """
+    Вложенный ресурс вида titles/<id>/reviews/<id>/comments. Родитель
+    проверяется одним запросом по всей цепочке идентификаторов из URL
+    и запоминается на запросе, поэтому get_queryset, проверки прав и
+    perform_create не ищут его повторно.
+    """
+
+    parent_model = None
+    # Внешний ключ дочерней модели на родителя.
+    parent_field = None
+    # Поле родителя -> именованный аргумент URL.
+    parent_lookups = {}
+    parent_only = ('id',)
+
+    def get_parent_filter(self):
+        return {
+            field: self.kwargs.get(kwarg)
+            for field, kwarg in self.parent_lookups.items()
+        }
+
+    def get_parent(self):
+        parent = getattr(self.request, '_nested_parent', None)
+        if parent is None:
+            parent = get_object_or_404(
+                self.parent_model.objects.only(*self.parent_only),
+                **self.get_parent_filter()
+            )
+            self.request._nested_parent = parent
+        return parent
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.detail:
+            # Объект и цепочка родителей проверяются одним запросом:
+            # чужой родитель в URL даёт 404 так же, как и отсутствующий.
+            return queryset.filter(**{
+                f'{self.parent_field}__{field}': value
+                for field, value in self.get_parent_filter().items()
+            })
+        return queryset.filter(**{self.parent_field: self.get_parent()})
+
+
+class ConditionalListMixin:
+    """
+    ETag и Last-Modified для list по поколениям ресурсов из
+    get_condition_resources. Ответ 304 отдаётся до обращения к queryset
+    и сериализаторам. Поколения в локальном кэше не видят записей других
+    процессов, поэтому валидаторы выдаются только с общим кэшем.
+    """
+
+    def get_condition_resources(self):
+        return (self.cache_resource,)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        if not settings.CACHE_SHARED:
+            return handler(request, *args, **kwargs)
+        resources = self.get_condition_resources()
+        etag, last_modified = response_validators(resources, request)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        with read_primary_after_change(resources):
+            response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+
+class ConditionalMixin(ConditionalListMixin):
+    """То же для list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,187 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       LimitOffsetPagination,
+                                       _reverse_ordering)
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация по всем полям ordering сразу. Курсор хранит
+    значения полей последней записи, следующая страница выбирается
+    условием a <= x AND ((a < x) OR (a = x AND b < y)) по составному
+    индексу: граница по первому полю задаёт диапазон сканирования,
+    а совпадающие значения первого поля не ломают пагинацию.
+    """
+
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            _, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.keyset_condition(queryset, current_position, reverse)
+            )
+
+        # Лишняя запись показывает, есть ли страница дальше по курсору.
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > len(self.page)
+        self.next_position = self.previous_position = current_position
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = current_position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def ordering_field(self, queryset, name):
+        """Поле модели или аннотации, по которому идёт сортировка."""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def position_value(self, queryset, name, value):
+        """
+        Значение из курсора, приведённое к типу поля. Курсор приходит от
+        клиента, поэтому неподходящее значение даёт 404, а не ошибку БД.
+        """
+        try:
+            value = self.ordering_field(queryset, name).to_python(value)
+        except (TypeError, ValueError, ValidationError):
+            value = None
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value
+
+    def keyset_condition(self, queryset, position, reverse):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        condition = Q()
+        bound = None
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            value = self.position_value(queryset, name, value)
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            if bound is None:
+                bound = Q(**{f'{name}__{lookup}e': value})
+            equal[name] = value
+        # Без границы по первому полю OR-цепочка не даёт диапазона по
+        # индексу, и БД перебирает строки с начала: страница N стоит O(N).
+        return bound & condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=False,
+            position=self._get_position_from_instance(
+                self.page[-1], self.ordering
+            ) if self.page else self.next_position,
+        ))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=True,
+            position=self._get_position_from_instance(
+                self.page[0], self.ordering
+            ) if self.page else self.previous_position,
+        ))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            value = getattr(instance, field.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        return json.dumps(values)
+
+
+class PubDateCursorPagination(KeysetCursorPagination):
+    """Курсорная пагинация по (pub_date, id) без подсчёта общего числа."""
+
+    ordering = ('-pub_date', '-id')
+
+
+class OptionalCursorPagination(LimitOffsetPagination):
+    """
+    По умолчанию limit/offset. Курсорный режим включается параметром
+    pagination=cursor, дальше клиент переходит по ссылкам next/previous.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_pagination_class = PubDateCursorPagination
+
+    def is_cursor_requested(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.is_cursor_requested(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class SearchCursorPagination(KeysetCursorPagination):
+    """Курсорная пагинация результатов поиска по (rank, id)."""
+
+    ordering = ('-rank', '-id')
+
+
+class RankingCursorPagination(KeysetCursorPagination):
+    """
+    Курсорная пагинация рейтинга: порядок (-поле рейтинга, title_id)
+    совпадает с индексом сводной таблицы и выбирается вьюхой.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        return view.get_ranking_ordering()
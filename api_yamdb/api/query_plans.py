@@ -0,0 +1,49 @@
+from django.db.models import Prefetch
+
+from reviews.models import SCORE_FIELDS, Genre
+
+
+def title_read_plan(queryset):
+    """
+    План чтения произведений для TitleReadSerializer:
+    категория подтягивается JOIN, жанры одним дополнительным запросом.
+    """
+    return queryset.select_related('category').prefetch_related(
+        Prefetch('genre', queryset=Genre.objects.only('name', 'slug'))
+    ).only(
+        'id',
+        'name',
+        'year',
+        'rating',
+        'description',
+        'category',
+        'category__name',
+        'category__slug',
+        # Гистограмма нужна для ?include=stats и почти ничего не стоит.
+        'review_count',
+        *SCORE_FIELDS.values(),
+    )
+
+
+def title_stats_plan(queryset):
+    """План статистики оценок: только счётчики, без связанных данных."""
+    return queryset.only('id', 'rating', 'review_count',
+                         *SCORE_FIELDS.values())
+
+
+def title_write_plan(queryset):
+    """
+    План загрузки изменяемого произведения. Жанры не предзагружаются:
+    после сохранения DRF сбрасывает кэш prefetch_related.
+    """
+    return queryset.select_related('category')
+
+
+def authored_read_plan(queryset):
+    """План чтения отзывов и комментариев: автор загружается JOIN."""
+    return queryset.select_related('author')
+
+
+def review_read_plan(queryset):
+    """План чтения отзывов: без столбца полнотекстового поиска."""
+    return authored_read_plan(queryset).defer('search_vector')
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+
+from reviews.models import Review, Title
+
+# Поля для поиска подстрокой, если база не Postgres (SQLite в тестах).
+FALLBACK_FIELDS = {
+    Title: ('name', 'description'),
+    Review: ('text',),
+}
+
+
+def search(queryset, text):
+    """
+    Возвращает документы, подходящие под запрос, с аннотацией rank.
+    В Postgres используется tsvector с GIN-индексом и ts_rank,
+    в остальных СУБД - поиск подстроки с одинаковым rank.
+    """
+    if not text:
+        return queryset.none().annotate(
+            rank=Value(1.0, output_field=FloatField())
+        )
+    if connections[queryset.db].vendor == 'postgresql':
+        query = SearchQuery(
+            text, config=settings.SEARCH_CONFIG, search_type='websearch'
+        )
+        # ts_rank возвращает real, а значение из курсора сравнивается как
+        # double precision: без приведения равные ранги на границе
+        # страницы не совпадают, и строки пропускаются или повторяются.
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+    condition = Q()
+    for field in FALLBACK_FIELDS[queryset.model]:
+        condition |= Q(**{f'{field}__icontains': text})
+    return queryset.filter(condition).annotate(
+        rank=Value(1.0, output_field=FloatField())
+    )
@@ -1,8 +1,10 @@
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
-from reviews.models import Title, Category, Genre, Review, Comments
+from reviews.models import (SCORE_FIELDS, Title, Category, Genre, Review,
+                            Comments)
+from reviews.ratings import score_statistics
 from users.models import User
 from api_yamdb import settings
+from .slugs import CachedSlugRelatedField
 from .utils import username_validation
 
 
@@ -19,19 +21,20 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 class TitleSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
         slug_field='slug',
         many=True,
         queryset=Genre.objects.all()
     )
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all(), )
     year = serializers.IntegerField()
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('rating_sum', 'review_count', 'search_vector',
+                   *SCORE_FIELDS.values())
 
 
 class TitleReadSerializer(serializers.ModelSerializer):
@@ -43,6 +46,7 @@ class TitleReadSerializer(serializers.ModelSerializer):
     )
     rating = serializers.IntegerField(
         read_only=True)
+    stats = serializers.SerializerMethodField()
 
     class Meta:
         fields = (
@@ -53,9 +57,45 @@ class TitleReadSerializer(serializers.ModelSerializer):
             'description',
             'genre',
             'category',
+            'stats',
         )
         model = Title
 
+    def get_fields(self):
+        """Статистика оценок выводится только по ?include=stats."""
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if (request is None
+                or 'stats' not in request.query_params.getlist('include')):
+            fields.pop('stats')
+        return fields
+
+    def get_stats(self, title):
+        return TitleStatsSerializer(title).data
+
+
+class TitleStatsSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    rating = serializers.FloatField(allow_null=True)
+    median = serializers.IntegerField(allow_null=True)
+    percentiles = serializers.DictField(
+        child=serializers.IntegerField(allow_null=True)
+    )
+    distribution = serializers.DictField(child=serializers.IntegerField())
+
+    def to_representation(self, title):
+        return super().to_representation(score_statistics(title))
+
+
+class RankingSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='title_id')
+    name = serializers.CharField(source='title.name')
+    year = serializers.IntegerField(source='title.year')
+    rating = serializers.FloatField()
+    review_count = serializers.IntegerField()
+    recent_reviews = serializers.IntegerField()
+    trending = serializers.FloatField()
+
 
 class UsersSerializer(serializers.ModelSerializer):
     username = serializers.CharField(
@@ -90,17 +130,10 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ('id', 'score', 'text', 'pub_date', 'author')
         read_only_fields = ('id', 'pub_date', 'author',)
 
-    def validate(self, data):
-        title_id = self.context['view'].kwargs.get('title_id')
-
-        author = self.context.get('request').user
-        title = get_object_or_404(Title, id=title_id)
-        if (title.reviews.filter(author=author).exists()
-                and self.context.get('request').method != 'PATCH'):
-            raise serializers.ValidationError(
-                'Можно оставлять только один отзыв!'
-            )
-        return data
+
+class ReviewSearchSerializer(ReviewSerializer):
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title',)
 
 
 class CommentSerializer(serializers.ModelSerializer):
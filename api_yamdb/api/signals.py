@@ -0,0 +1,124 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save)
+
+from reviews.bulk import bulk_changed
+from reviews.models import Category, Comments, Genre, GenreTitle, Review, Title
+from reviews.rankings import rankings_refreshed
+from users.models import User
+
+from .authentication import invalidate_role_state
+from .cache import (ALL_COMMENTS, ALL_REVIEWS, bump_generation,
+                    comments_resource, reviews_resource)
+from .slugs import SLUG_RESOURCES
+
+# Какие закэшированные списки устаревают при изменении модели.
+INVALIDATED_RESOURCES = {
+    Category: ('categories', 'titles', SLUG_RESOURCES[Category]),
+    Genre: ('genres', 'titles', SLUG_RESOURCES[Genre]),
+    Title: ('titles',),
+    GenreTitle: ('titles',),
+    Review: ('titles',),
+}
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    """
+    Сдвигает поколение ресурсов после фиксации транзакции, чтобы
+    читатель не закэшировал под новым поколением незафиксированные данные.
+    """
+    resources = INVALIDATED_RESOURCES[sender]
+    transaction.on_commit(lambda: bump_generation(*resources))
+
+
+for model in INVALIDATED_RESOURCES:
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+
+
+# Поколения, привязанные к родителю: по ним строятся ETag отзывов
+# произведения и комментариев отзыва.
+SCOPED_RESOURCES = {
+    Title: lambda title: (reviews_resource(title.pk),),
+    Review: lambda review: (
+        reviews_resource(review.title_id), comments_resource(review.pk)
+    ),
+    Comments: lambda comment: (comments_resource(comment.review_id),),
+}
+
+
+def invalidate_scoped_resources(sender, instance, **kwargs):
+    resources = SCOPED_RESOURCES[sender](instance)
+    transaction.on_commit(lambda: bump_generation(*resources))
+
+
+for model in SCOPED_RESOURCES:
+    post_save.connect(invalidate_scoped_resources, sender=model)
+    post_delete.connect(invalidate_scoped_resources, sender=model)
+
+
+def invalidate_title_genres(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_cached_responses(GenreTitle)
+
+
+m2m_changed.connect(invalidate_title_genres, sender=Title.genre.through)
+
+
+# Поколения, которые массовая запись сдвигает вместо поколений
+# отдельных родителей из SCOPED_RESOURCES.
+BULK_RESOURCES = {
+    Review: (ALL_REVIEWS, ALL_COMMENTS),
+    Comments: (ALL_COMMENTS,),
+}
+
+
+def invalidate_bulk_changes(sender, **kwargs):
+    """
+    Массовая загрузка идёт через bulk_create без сигналов моделей,
+    поэтому о ней сообщает отдельный сигнал уже после фиксации.
+    """
+    bump_generation(
+        *INVALIDATED_RESOURCES.get(sender, ()),
+        *BULK_RESOURCES.get(sender, ())
+    )
+
+
+bulk_changed.connect(invalidate_bulk_changes)
+
+
+def invalidate_user_roles(sender, instance, **kwargs):
+    """Токены пользователя перепроверяются по свежему состоянию из БД."""
+    transaction.on_commit(lambda: invalidate_role_state(instance.pk))
+
+
+post_save.connect(invalidate_user_roles, sender=User)
+post_delete.connect(invalidate_user_roles, sender=User)
+
+
+def remember_username(sender, instance, **kwargs):
+    # Отложенное поле не читается, чтобы не делать запрос на экземпляр.
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+def invalidate_renamed_author(sender, instance, created, **kwargs):
+    """
+    Отзывы и комментарии выводят имя автора, поэтому после смены имени
+    их ETag и закэшированные ответы устаревают.
+    """
+    if not created and instance.username != instance._loaded_username:
+        transaction.on_commit(
+            lambda: bump_generation(ALL_REVIEWS, ALL_COMMENTS)
+        )
+    instance._loaded_username = instance.username
+
+
+post_init.connect(remember_username, sender=User)
+post_save.connect(invalidate_renamed_author, sender=User)
+
+
+def invalidate_rankings(sender, **kwargs):
+    bump_generation('rankings')
+
+
+rankings_refreshed.connect(invalidate_rankings)
@@ -0,0 +1,102 @@
+import threading
+
+from django.db import router
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+
+from reviews.models import Category, Genre
+
+from .cache import get_generation
+
+# Ресурсы кэша, поколение которых сдвигается при изменении таблицы.
+SLUG_RESOURCES = {
+    Category: 'category_slugs',
+    Genre: 'genre_slugs',
+}
+
+_slug_maps = {}
+_slug_maps_lock = threading.Lock()
+
+
+def slug_map(model):
+    """
+    Словарь слаг -> id из памяти процесса. Версия словаря сверяется с
+    поколением ресурса в общем кэше, поэтому запись в любом процессе
+    делает недействительными словари всех процессов.
+    """
+    generation = get_generation(SLUG_RESOURCES[model])
+    cached = _slug_maps.get(model)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    mapping = dict(model.objects.values_list('slug', 'id'))
+    with _slug_maps_lock:
+        _slug_maps[model] = (generation, mapping)
+    return mapping
+
+
+def reference(model, pk, slug):
+    """Объект для присвоения связи без загрузки строки из БД."""
+    instance = model(pk=pk, slug=slug)
+    instance._state.adding = False
+    instance._state.db = router.db_for_write(model)
+    return instance
+
+
+def resolve_slugs(model, slugs):
+    """
+    Объекты по слагам и список неизвестных слагов. Слаги, которых нет
+    в словаре, проверяются по БД: они могли появиться через массовую
+    загрузку, которая не отправляет сигналов.
+    """
+    mapping = slug_map(model)
+    missing = [slug for slug in slugs if slug not in mapping]
+    if missing:
+        mapping = dict(mapping, **dict(
+            model.objects.filter(slug__in=missing).values_list('slug', 'id')
+        ))
+    unknown = [slug for slug in dict.fromkeys(slugs) if slug not in mapping]
+    instances = [
+        reference(model, mapping[slug], slug)
+        for slug in slugs if slug in mapping
+    ]
+    return instances, unknown
+
+
+class ManyCachedSlugRelatedField(ManyRelatedField):
+    """Список слагов, неизвестные слаги выводятся одной ошибкой."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        model = self.child_relation.get_queryset().model
+        instances, unknown = resolve_slugs(model, [str(slug) for slug in data])
+        if unknown:
+            raise serializers.ValidationError(
+                f'Не найдены слаги: {", ".join(unknown)}'
+            )
+        return instances
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    Связь по слагу, которая разрешается по словарю слагов в памяти
+    процесса, а не запросом к БД на каждое значение.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return ManyCachedSlugRelatedField(**list_kwargs)
+
+    def to_internal_value(self, data):
+        model = self.get_queryset().model
+        instances, unknown = resolve_slugs(model, [str(data)])
+        if unknown:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=data)
+        return instances[0]
@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (UsersViewSet, TokenView, SignupView,
                     TitleViewSet, CategoryViewSet, GenreViewSet,
-                    ReviewViewSet, CommentViewSet)
+                    ReviewViewSet, CommentViewSet, CacheStatsView,
+                    SearchView, RankingView)
 
 app_name = 'api'
 
@@ -43,5 +44,8 @@ urlpatterns = [
     path('', include(router_v1.urls)),
     path('v1/auth/signup/', SignupView.as_view(), name='signup'),
     path('v1/auth/token/', TokenView.as_view(), name='token'),
+    path('v1/search/', SearchView.as_view(), name='search'),
+    path('v1/rankings/', RankingView.as_view(), name='rankings'),
+    path('v1/cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
     path('v1/', include(router_v1.urls)),
 ]
@@ -9,9 +9,15 @@ def send_confirmation_code(user):
     """
     Отправляет код для регистрации на почту.
     В качестве аргумента принимает проверенные данные сериализатора
-    и объект пользователя.
+    и объект пользователя. При включённой очереди писем письмо только
+    ставится в очередь, а отправляет его команда send_emails.
     """
-    send_mail(
+    # users.models импортирует этот модуль, поэтому очередь писем
+    # подключается при вызове, а не при импорте.
+    from users.outbox import enqueue_email
+
+    deliver = enqueue_email if settings.EMAIL_OUTBOX else send_mail
+    deliver(
         subject='Регистрация на Yamdb',
         message=(
             'Для завершения регистрации на Yamdb отправьте запрос '
@@ -39,3 +45,11 @@ def username_validation(value):
                               'в username. Имя пользователя может содержать '
                               'только буквы, цифры и символы @ . + - _.')
     return value
+
+
+def percentile(values, share):
+    """Значение, ниже которого лежит доля share замеров (0.0 без замеров)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
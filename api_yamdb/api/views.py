@@ -1,10 +1,9 @@
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, viewsets, views
+from rest_framework import filters, generics, viewsets, views
 from rest_framework import permissions
 from rest_framework.decorators import action
 from rest_framework.mixins import (DestroyModelMixin,
@@ -12,25 +11,45 @@ from rest_framework.mixins import (DestroyModelMixin,
                                    ListModelMixin)
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
+from rest_framework.settings import api_settings
 from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.tokens import default_token_generator
 
-from reviews.models import Title, Category, Genre, Review
+from reviews.models import (Title, Category, Genre, Review, Comments,
+                            GenreRanking, TitleRanking)
+from reviews.rankings import RANKING_ORDERS
 from users.models import User
+from .authentication import access_token_for, model_user
+from .batch import batch_response_status, create_titles, link_genres
+from .cache import (ALL_COMMENTS, ALL_REVIEWS, cache_stats,
+                    comments_resource, reviews_resource)
 from .filter import TitleFilter
+from .metrics import PrometheusRenderer, collect, exposition
+from .mixins import (CachedListMixin, ConditionalListMixin,
+                     ConditionalMixin, NestedParentMixin, QueryPlanMixin,
+                     SerializationTimingMixin)
+from .pagination import (OptionalCursorPagination, RankingCursorPagination,
+                         SearchCursorPagination)
 from .permissions import (AdminOnly, IsAdminUserOrReadOnly,
                           AdminModeratorAuthorPermission)
+from .query_plans import (authored_read_plan, review_read_plan,
+                          title_read_plan, title_stats_plan,
+                          title_write_plan)
 from .serializers import (TitleSerializer, CategorySerializer,
                           GenreSerializer, UsersSerializer,
                           ReviewSerializer, JWTTokenSerializer,
                           CommentSerializer, TitleReadSerializer,
-                          SignupSerializer
+                          SignupSerializer, ReviewSearchSerializer,
+                          TitleStatsSerializer, RankingSerializer
                           )
+from .search import search
+from .slugs import resolve_slugs
 from .utils import send_confirmation_code
 
+DUPLICATE_REVIEW = 'Можно оставлять только один отзыв!'
 
-class UsersViewSet(viewsets.ModelViewSet):
+
+class UsersViewSet(SerializationTimingMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UsersSerializer
     filter_backends = [filters.SearchFilter]
@@ -43,19 +62,22 @@ class UsersViewSet(viewsets.ModelViewSet):
             permission_classes=[permissions.IsAuthenticated],
             url_path='me', url_name='me')
     def me(self, request, *args, **kwargs):
-        instance = self.request.user
+        instance = get_object_or_404(User, pk=self.request.user.pk)
         serializer = self.get_serializer(instance)
 
         if self.request.method == 'PATCH':
             serializer = self.get_serializer(
                 instance, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=self.request.user.role)
+            serializer.save(role=instance.role)
         return Response(serializer.data)
 
 
-class CategoryViewSet(CreateModelMixin, ListModelMixin,
-                      DestroyModelMixin, viewsets.GenericViewSet):
+class CategoryViewSet(ConditionalListMixin, CachedListMixin,
+                      SerializationTimingMixin, CreateModelMixin,
+                      ListModelMixin, DestroyModelMixin,
+                      viewsets.GenericViewSet):
+    cache_resource = 'categories'
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     filter_backends = (filters.SearchFilter,)
@@ -64,8 +86,11 @@ class CategoryViewSet(CreateModelMixin, ListModelMixin,
     permission_classes = (IsAdminUserOrReadOnly,)
 
 
-class GenreViewSet(CreateModelMixin, ListModelMixin,
-                   DestroyModelMixin, viewsets.GenericViewSet):
+class GenreViewSet(ConditionalListMixin, CachedListMixin,
+                   SerializationTimingMixin, CreateModelMixin,
+                   ListModelMixin, DestroyModelMixin,
+                   viewsets.GenericViewSet):
+    cache_resource = 'genres'
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     filter_backends = (filters.SearchFilter,)
@@ -74,9 +99,17 @@ class GenreViewSet(CreateModelMixin, ListModelMixin,
     permission_classes = (IsAdminUserOrReadOnly,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('id')
+class TitleViewSet(ConditionalMixin, CachedListMixin, QueryPlanMixin,
+                   SerializationTimingMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.order_by('id')
+    cache_resource = 'titles'
+    query_plans = {
+        'list': title_read_plan,
+        'retrieve': title_read_plan,
+        'update': title_write_plan,
+        'partial_update': title_write_plan,
+        'stats': title_stats_plan,
+    }
     serializer_class = TitleSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
@@ -85,51 +118,204 @@ class TitleViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleReadSerializer
+        if self.action == 'stats':
+            return TitleStatsSerializer
         return TitleSerializer
 
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Создание списка произведений одним запросом."""
+        results = create_titles(request.data)
+        return Response(results, status=batch_response_status(results))
+
+    @action(detail=False, methods=['post'], url_path='genre-links')
+    def genre_links(self, request):
+        """Привязка жанров к произведениям списком пар title-genre."""
+        results = link_genres(request.data)
+        return Response(results, status=batch_response_status(results))
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """Распределение оценок, медиана и перцентили произведения."""
+        return Response(self.get_serializer(self.get_object()).data)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(ConditionalMixin, NestedParentMixin, QueryPlanMixin,
+                    SerializationTimingMixin, viewsets.ModelViewSet):
+    queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = (AdminModeratorAuthorPermission,)
+    pagination_class = OptionalCursorPagination
+    parent_model = Title
+    parent_field = 'title'
+    parent_lookups = {'pk': 'title_id'}
+    query_plans = {
+        'list': review_read_plan,
+        'retrieve': review_read_plan,
+    }
 
-    def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+    def get_condition_resources(self):
+        # Несуществующее произведение даёт 404 раньше сверки ETag.
+        title = self.get_parent()
+        return (reviews_resource(title.pk), ALL_REVIEWS)
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        serializer.save(
-            title=title,
-            author=self.request.user
-        )
+        """
+        Единственность отзыва автора проверяет ограничение unique_together
+        при вставке: без предварительного SELECT и без гонки между
+        проверкой и вставкой при одновременных запросах.
+        """
+        title = self.get_parent()
+        try:
+            serializer.save(title=title, author=model_user(self.request.user))
+        except IntegrityError:
+            if not Review.objects.filter(
+                title=title, author_id=self.request.user.pk
+            ).exists():
+                raise
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_REVIEW]}
+            )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalMixin, NestedParentMixin, QueryPlanMixin,
+                     SerializationTimingMixin, viewsets.ModelViewSet):
+    queryset = Comments.objects.all()
     serializer_class = CommentSerializer
     permission_classes = (AdminModeratorAuthorPermission,)
+    pagination_class = OptionalCursorPagination
+    parent_model = Review
+    parent_field = 'review'
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    parent_only = ('id', 'title_id')
+    query_plans = {
+        'list': authored_read_plan,
+        'retrieve': authored_read_plan,
+    }
 
-    def get_queryset(self):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'))
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        review = get_object_or_404(
-            Review.objects.filter(title_id=title.id), pk=review.id
-        )
-        return review.comments.all()
+    def get_condition_resources(self):
+        review = self.get_parent()
+        return (comments_resource(review.pk), ALL_COMMENTS)
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'))
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        review = get_object_or_404(
-            Review.objects.filter(title_id=title.id), pk=review.id
-        )
         serializer.save(
-            review=review,
-            author=self.request.user
+            review=self.get_parent(),
+            author=model_user(self.request.user)
         )
 
 
+class SearchView(SerializationTimingMixin, generics.ListAPIView):
+    """
+    Полнотекстовый поиск: ?q=<запрос>&type=titles|reviews.
+    Результаты упорядочены по релевантности.
+    """
+
+    pagination_class = SearchCursorPagination
+    search_types = {
+        'titles': (Title.objects.all(), TitleReadSerializer),
+        'reviews': (review_read_plan(Review.objects.all()),
+                    ReviewSearchSerializer),
+    }
+
+    def get_search_type(self):
+        search_type = self.request.query_params.get('type', 'titles')
+        if search_type not in self.search_types:
+            raise ValidationError({
+                'type': (
+                    f'Допустимые значения: {", ".join(self.search_types)}'
+                )
+            })
+        return self.search_types[search_type]
+
+    def get_queryset(self):
+        queryset, _ = self.get_search_type()
+        text = self.request.query_params.get('q', '').strip()
+        if queryset.model is Title:
+            queryset = title_read_plan(queryset)
+        return search(queryset, text)
+
+    def get_serializer_class(self):
+        _, serializer_class = self.get_search_type()
+        return serializer_class
+
+
+class RankingView(ConditionalListMixin, SerializationTimingMixin,
+                  generics.ListAPIView):
+    """
+    Рейтинги произведений: ?order=rating|trending|reviews, фильтры
+    ?genre=<слаг> и ?category=<слаг>. Страница читается из сводных
+    таблиц по индексу, которые обновляет команда refresh_rankings.
+    """
+
+    cache_resource = 'rankings'
+    serializer_class = RankingSerializer
+    pagination_class = RankingCursorPagination
+
+    def get_condition_resources(self):
+        # Названия произведений читаются из основной таблицы.
+        return (self.cache_resource, TitleViewSet.cache_resource)
+
+    def get_ranking_ordering(self):
+        order = self.request.query_params.get('order', 'rating')
+        if order not in RANKING_ORDERS:
+            raise ValidationError(
+                {'order': f'Допустимые значения: {", ".join(RANKING_ORDERS)}'}
+            )
+        return (f'-{RANKING_ORDERS[order]}', 'title_id')
+
+    def get_slug_id(self, model, param):
+        slug = self.request.query_params.get(param)
+        if slug is None:
+            return None
+        # Слаг, которого нет в словаре (массовая загрузка не сдвигает
+        # его поколение сразу), проверяется по БД.
+        instances, unknown = resolve_slugs(model, [slug])
+        if unknown:
+            raise ValidationError({param: f'Слаг {slug} не найден'})
+        return instances[0].pk
+
+    def get_queryset(self):
+        genre_id = self.get_slug_id(Genre, 'genre')
+        category_id = self.get_slug_id(Category, 'category')
+        if genre_id is None:
+            queryset = TitleRanking.objects.all()
+        else:
+            queryset = GenreRanking.objects.filter(genre_id=genre_id)
+        if category_id is not None:
+            queryset = queryset.filter(category_id=category_id)
+        return queryset.select_related('title').only(
+            'title', 'title__name', 'title__year', 'rating',
+            'review_count', 'recent_reviews', 'trending'
+        ).order_by(*self.get_ranking_ordering())
+
+
+class CacheStatsView(views.APIView):
+    """Счётчики попаданий и промахов кэша списков."""
+
+    permission_classes = (permissions.IsAuthenticated, AdminOnly,)
+
+    def get(self, request):
+        return Response(cache_stats(
+            (CategoryViewSet.cache_resource,
+             GenreViewSet.cache_resource,
+             TitleViewSet.cache_resource)
+        ))
+
+
+class MetricsView(views.APIView):
+    """Метрики запросов в текстовом формате Prometheus."""
+
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request):
+        return Response(exposition(*collect()))
+
+
 class SignupView(views.APIView):
 
+    @transaction.atomic
     def post(self, request):
         serializer = SignupSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -172,8 +358,6 @@ class TokenView(views.APIView):
             )
         return Response(
             {
-                "token": str(
-                    RefreshToken.for_user(user).access_token
-                )
+                "token": str(access_token_for(user))
             }
         )
@@ -31,6 +31,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ConnectionHealthCheckMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,9 +73,74 @@ DATABASES = {
             'USER': os.getenv('POSTGRES_USER', default='postgres'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
             'HOST': os.getenv('DB_HOST', default='db'),
-            'PORT': os.getenv('DB_PORT', default='5432')
+            'PORT': os.getenv('DB_PORT', default='5432'),
+            # Время жизни соединения в секундах: 0 — новое соединение на
+            # каждый запрос, пусто — без ограничения.
+            'CONN_MAX_AGE': (
+                int(os.getenv('DB_CONN_MAX_AGE', default=60))
+                if os.getenv('DB_CONN_MAX_AGE') != '' else None
+            ),
+            # pgbouncer в режиме transaction не сохраняет серверные курсоры
+            # между транзакциями.
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.getenv('DB_PGBOUNCER', default='False') == 'True'
+            ),
         }
     }
+# Реплики для чтения через запятую: host[:port] для Postgres или путь к
+# файлу для SQLite. Схема и данные реплик поддерживаются репликацией.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', default='').split(',')), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if DATABASES[alias]['ENGINE'].endswith('sqlite3'):
+        DATABASES[alias]['NAME'] = replica
+    else:
+        host, _, port = replica.partition(':')
+        DATABASES[alias]['HOST'] = host
+        DATABASES[alias]['PORT'] = port or DATABASES['default']['PORT']
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+# После записи клиент читает с основной базы столько секунд.
+DATABASE_STICKY_SECONDS = int(os.getenv('DB_STICKY_SECONDS', default=5))
+DATABASE_STICKY_COOKIE = 'read_primary'
+# Простоявшее дольше стольких секунд соединение проверяется перед запросом.
+DB_HEALTH_CHECK_IDLE = int(os.getenv('DB_HEALTH_CHECK_IDLE', default=10))
+# Cache
+# Локальный LRU-кэш с вытеснением по числу записей; в production задаётся
+# общий бэкенд, например
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# (сервис memcached в docker-compose).
+
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND',
+    default='django.core.cache.backends.locmem.LocMemCache'
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+if CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', default=1000)),
+    }
+# Поколения кэша видны всем процессам только в общем бэкенде: запись
+# в одном воркере не сбрасывает локальный кэш другого.
+CACHE_SHARED = os.getenv(
+    'CACHE_SHARED',
+    default=str(not CACHE_BACKEND.endswith(('LocMemCache', 'DummyCache')))
+) == 'True'
+
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+
+# Full-text search
+
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', default='russian')
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -114,9 +182,22 @@ AUTH_USER_MODEL = 'users.User'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
+# В режиме без состояния роль берётся из токена, а пользователь не
+# загружается из БД на каждый запрос. Смена роли или блокировка
+# замечаются через общий кэш, локальный кэш процесса отстаёт не более
+# чем на JWT_ROLE_LOCAL_TTL секунд. Сброс в локальном кэше не доходит
+# до других воркеров, поэтому без общего кэша режим выключен.
+JWT_STATELESS = os.getenv(
+    'JWT_STATELESS', default=str(CACHE_SHARED)
+) == 'True'
+JWT_ROLE_LOCAL_TTL = int(os.getenv('JWT_ROLE_LOCAL_TTL', default=30))
+JWT_ROLE_CACHE_TIMEOUT = int(
+    os.getenv('JWT_ROLE_CACHE_TIMEOUT', default=3600)
+)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -137,8 +218,65 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DEFAULT_FROM_EMAIL = 'slobozhaninovaw@gmail.com'
 
+# Письма ставятся в очередь в транзакции запроса и отправляются командой
+# send_emails. EMAIL_OUTBOX=False возвращает отправку прямо из запроса.
+EMAIL_OUTBOX = os.getenv('EMAIL_OUTBOX', default='True') == 'True'
+EMAIL_OUTBOX_BATCH_SIZE = int(
+    os.getenv('EMAIL_OUTBOX_BATCH_SIZE', default=100)
+)
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(
+    os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', default=8)
+)
+# Задержка повтора удваивается с каждой попыткой, секунды.
+EMAIL_OUTBOX_RETRY_DELAY = int(
+    os.getenv('EMAIL_OUTBOX_RETRY_DELAY', default=30)
+)
+EMAIL_OUTBOX_MAX_DELAY = int(
+    os.getenv('EMAIL_OUTBOX_MAX_DELAY', default=3600)
+)
+
 LIST_PER_PAGE = 10
 
+# Наибольшее число объектов в одном запросе пакетных эндпоинтов.
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', default=1000))
+
+# Рейтинги произведений пересобираются командой refresh_rankings.
+# Популярность — сумма оценок отзывов за RANKING_RECENT_DAYS дней,
+# вес отзыва уменьшается вдвое каждые RANKING_HALF_LIFE_HOURS часов.
+RANKING_RECENT_DAYS = int(os.getenv('RANKING_RECENT_DAYS', default=7))
+RANKING_HALF_LIFE_HOURS = float(
+    os.getenv('RANKING_HALF_LIFE_HOURS', default=48)
+)
+RANKING_BATCH_SIZE = int(os.getenv('RANKING_BATCH_SIZE', default=1000))
+RANKING_REFRESH_INTERVAL = int(
+    os.getenv('RANKING_REFRESH_INTERVAL', default=300)
+)
+
+# Метрики запросов для /metrics. SQL учитывается у доли
+# METRICS_SAMPLE_RATE запросов; снимки воркеров сводятся через общий
+# кэш (CACHE_SHARED) раз в METRICS_FLUSH_INTERVAL секунд.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', default='True') == 'True'
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', default=0.1))
+METRICS_DUPLICATE_THRESHOLD = int(
+    os.getenv('METRICS_DUPLICATE_THRESHOLD', default=3)
+)
+METRICS_FLUSH_INTERVAL = float(
+    os.getenv('METRICS_FLUSH_INTERVAL', default=10)
+)
+METRICS_WORKER_TIMEOUT = int(
+    os.getenv('METRICS_WORKER_TIMEOUT', default=300)
+)
+
+# Базовый прогон команды benchmark ({vendor} — СУБД прогона) и
+# допустимый рост задержек.
+BENCHMARK_BASELINE = os.getenv(
+    'BENCHMARK_BASELINE',
+    default=os.path.join(
+        BASE_DIR.parent, 'benchmarks', 'baseline-{vendor}.json'
+    )
+)
+BENCHMARK_THRESHOLD = float(os.getenv('BENCHMARK_THRESHOLD', default=0.25))
+
 USERNAME_MAX_LENGTH = 150
 EMAIL_MAX_LENGTH = 254
 CONFIRMATION_CODE_MAX_LENGTH = 100
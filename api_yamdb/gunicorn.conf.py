@@ -0,0 +1,43 @@
+"""
+Настройки gunicorn. Режим воркеров выбирается переменной SERVER_MODE:
+
+sync    — синхронные воркеры, один запрос на процесс (по умолчанию);
+threads — воркеры gthread, GUNICORN_THREADS запросов на процесс;
+asgi    — воркеры uvicorn поверх api_yamdb.asgi. Django 3.2 выполняет
+          синхронные представления DRF в одном потоке на процесс,
+          поэтому этот режим не добавляет параллельности обычным
+          эндпоинтам и нужен для асинхронного кода.
+"""
+import multiprocessing
+import os
+
+SERVER_MODES = {
+    'sync': ('sync', 'api_yamdb.wsgi:application'),
+    'threads': ('gthread', 'api_yamdb.wsgi:application'),
+    'asgi': ('uvicorn.workers.UvicornWorker', 'api_yamdb.asgi:application'),
+}
+
+server_mode = os.getenv('SERVER_MODE', default='sync')
+worker_class, wsgi_app = SERVER_MODES[server_mode]
+
+# Воркеры согласуют кэш списков, роли пользователей и метрики только
+# через общий кэш (CACHE_SHARED в settings.py), поэтому с локальным
+# кэшем по умолчанию запускается один воркер.
+local_cache = os.getenv(
+    'CACHE_BACKEND', default='LocMemCache'
+).endswith(('LocMemCache', 'DummyCache'))
+shared_cache = os.getenv(
+    'CACHE_SHARED', default=str(not local_cache)
+) == 'True'
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS',
+    default=multiprocessing.cpu_count() * 2 + 1 if shared_cache else 1
+))
+if server_mode == 'threads':
+    # При threads > 1 gunicorn молча заменяет sync на gthread, поэтому
+    # потоки задаются только в режиме threads.
+    threads = int(os.getenv('GUNICORN_THREADS', default=8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', default=5))
@@ -1,8 +1,10 @@
 from django.contrib import admin
-from django.db.models import Avg
+from django.db.models import Prefetch
 
 from api_yamdb.settings import LIST_PER_PAGE
-from reviews.models import Category, Comments, Genre, GenreTitle, Review, Title
+from reviews.models import (Category, Comments, Genre, GenreRanking,
+                            GenreTitle, ImportCheckpoint, Review, Title,
+                            TitleRanking)
 
 
 @admin.register(Category)
@@ -52,9 +54,17 @@ class TitleAdmin(admin.ModelAdmin):
         'get_rating'
     )
     empty_value_display = 'значение отсутствует!'
-    list_filter = ('name',)
+    list_filter = ('category', 'year')
     list_per_page = LIST_PER_PAGE
-    search_fields = ('name', 'year', 'category')
+    list_select_related = ('category',)
+    # Поиск по названию использует триграммный индекс в Postgres,
+    # по категории — уникальный индекс слага.
+    search_fields = ('name', '=category__slug')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('genre', queryset=Genre.objects.only('name'))
+        )
 
     def get_genre(self, object):
         """Получает жанр или список жанров произведения."""
@@ -63,17 +73,20 @@ class TitleAdmin(admin.ModelAdmin):
     get_genre.short_description = 'Жанр произведения'
 
     def count_reviews(self, object):
-        """Вычисляет количество отзывов на произведение."""
-        return object.reviews.count()
+        """Количество отзывов хранится в произведении."""
+        return object.review_count
 
     count_reviews.short_description = 'Количество отзывов'
+    count_reviews.admin_order_field = 'review_count'
 
     def get_rating(self, object):
-        """Вычисляет рейтинг произведения."""
-        rating = object.reviews.aggregate(average_score=Avg('score'))
-        return round(rating.get('average_score'), 1)
+        """Рейтинг хранится в произведении и обновляется сигналами."""
+        if object.rating is None:
+            return None
+        return round(object.rating, 1)
 
     get_rating.short_description = 'Рейтинг'
+    get_rating.admin_order_field = 'rating'
 
 
 @admin.register(GenreTitle)
@@ -88,7 +101,8 @@ class GenreTitleAdmin(admin.ModelAdmin):
     empty_value_display = 'значение отсутствует!'
     list_filter = ('genre',)
     list_per_page = LIST_PER_PAGE
-    search_fields = ('title',)
+    list_select_related = ('genre', 'title')
+    search_fields = ('title__name',)
 
 
 @admin.register(Review)
@@ -104,9 +118,11 @@ class ReviewAdmin(admin.ModelAdmin):
         'title'
     )
     empty_value_display = 'значение отсутствует!'
-    list_filter = ('author', 'score', 'pub_date')
+    list_filter = ('score', 'pub_date')
     list_per_page = LIST_PER_PAGE
-    search_fields = ('author',)
+    list_select_related = ('author', 'title')
+    # Точное совпадение имени автора ищется по уникальному индексу.
+    search_fields = ('=author__username',)
 
 
 @admin.register(Comments)
@@ -121,9 +137,60 @@ class CommentAdmin(admin.ModelAdmin):
         'review'
     )
     empty_value_display = 'значение отсутствует!'
-    list_filter = ('author', 'pub_date')
+    list_filter = ('pub_date',)
+    list_per_page = LIST_PER_PAGE
+    list_select_related = ('author', 'review')
+    search_fields = ('=author__username',)
+
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    """Класс настройки контрольных точек загрузки csv."""
+
+    list_display = (
+        'name',
+        'rows',
+        'offset',
+        'finalize_pending',
+        'updated'
+    )
+    list_per_page = LIST_PER_PAGE
+
+
+@admin.register(TitleRanking)
+class TitleRankingAdmin(admin.ModelAdmin):
+    """Класс просмотра сводной таблицы рейтингов."""
+
+    list_display = (
+        'title',
+        'category',
+        'rating',
+        'review_count',
+        'recent_reviews',
+        'trending'
+    )
+    list_filter = ('category',)
+    list_per_page = LIST_PER_PAGE
+    list_select_related = ('title', 'category')
+    ordering = ('-rating', 'title')
+
+
+@admin.register(GenreRanking)
+class GenreRankingAdmin(admin.ModelAdmin):
+    """Класс просмотра рейтингов внутри жанров."""
+
+    list_display = (
+        'title',
+        'genre',
+        'rating',
+        'review_count',
+        'recent_reviews',
+        'trending'
+    )
+    list_filter = ('genre',)
     list_per_page = LIST_PER_PAGE
-    search_fields = ('author',)
+    list_select_related = ('title', 'genre')
+    ordering = ('genre', '-rating', 'title')
 
 
 admin.site.site_title = 'Администрирование'
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .indexes import create_postgres_indexes, create_search_triggers
+
+        post_migrate.connect(create_postgres_indexes, sender=self)
+        post_migrate.connect(create_search_triggers, sender=self)
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.dispatch import Signal
+
+# Отправляется после фиксации массовой записи, которая обходит сигналы
+# моделей (bulk_create, update): sender — изменённая модель.
+bulk_changed = Signal()
+
+
+def notify_bulk_change(*models, using=None):
+    """Отправляет bulk_changed по каждой модели после фиксации транзакции."""
+    def send():
+        for model in models:
+            bulk_changed.send(sender=model)
+
+    transaction.on_commit(send, using=using)
@@ -0,0 +1,243 @@
+import random
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db.models import Max
+from django.utils import timezone
+
+from .bulk import notify_bulk_change
+from .importers import DEFAULT_BATCH_SIZE, FILES, CsvImporter
+from .models import (Category, Comments, Genre, GenreTitle, Review, Title,
+                     User)
+
+DatasetSize = namedtuple(
+    'DatasetSize',
+    ('users', 'categories', 'genres', 'titles', 'reviews', 'comments'),
+    defaults=(100, 5, 10, 200, 2000, 4000)
+)
+FIRST_YEAR = 1950
+MAX_GENRES_PER_TITLE = 3
+DEFAULT_SKEW = 1.0
+DEFAULT_DAYS = 365
+# Во сколько раз число попыток выбрать автора с перекосом может
+# превысить число нужных авторов, прежде чем добор пойдёт равномерно.
+AUTHOR_ATTEMPTS = 4
+
+
+def skewed_index(rng, size, skew):
+    """
+    Индекс в [0, size) со степенным перекосом к началу: skew=0 —
+    равномерно, чем больше skew, тем чаще выпадают первые индексы.
+    """
+    return min(size - 1, int(size * rng.random() ** (1 + skew)))
+
+
+def allocate(total, size, cap, skew, rng):
+    """
+    Распределяет total отзывов по size произведениям с весами
+    1/rank^skew (закон Ципфа) в случайном порядке, не больше cap на
+    каждое — по одному отзыву автора на произведение.
+    """
+    if not size:
+        return []
+    weights = [(rank + 1) ** -skew for rank in range(size)]
+    rng.shuffle(weights)
+    scale = total / sum(weights)
+    counts = [min(cap, int(weight * scale)) for weight in weights]
+    remaining = total - sum(counts)
+    order = sorted(range(size), key=weights.__getitem__, reverse=True)
+    while remaining:
+        for index in order:
+            if remaining and counts[index] < cap:
+                counts[index] += 1
+                remaining -= 1
+    return counts
+
+
+def distinct_authors(rng, users, count, skew):
+    """count разных авторов, активные пользователи выпадают чаще."""
+    chosen = set()
+    attempts = 0
+    while len(chosen) < count and attempts < AUTHOR_ATTEMPTS * count:
+        chosen.add(skewed_index(rng, users, skew))
+        attempts += 1
+    while len(chosen) < count:
+        chosen.add(rng.randrange(users))
+    return chosen
+
+
+class DatasetGenerator:
+    """
+    Потоки строк синтетических данных в формате загрузчика CSV.
+    Идентификаторы продолжают уже существующие в базе, поэтому набор
+    можно добавлять к заполненной базе. Каждая таблица генерируется
+    своим генератором случайных чисел от seed, и данные не зависят
+    от размера пачек и порядка загрузки.
+    """
+
+    def __init__(self, size, seed=0, skew=DEFAULT_SKEW, days=DEFAULT_DAYS):
+        self.size = size
+        self.seed = seed
+        self.skew = skew
+        self.now = timezone.now()
+        self.days = days
+        self.first_ids = {
+            model: model.objects.aggregate(last=Max('id'))['last'] or 0
+            for model in (User, Category, Genre, Title, GenreTitle, Review,
+                          Comments)
+        }
+
+    def rng(self, name):
+        return random.Random(f'{self.seed}:{name}')
+
+    def ids(self, model, count):
+        first = self.first_ids[model] + 1
+        return range(first, first + count)
+
+    def pub_date(self, rng):
+        return self.now - timedelta(seconds=rng.randrange(
+            self.days * 24 * 60 * 60
+        ))
+
+    def users(self):
+        for user_id in self.ids(User, self.size.users):
+            yield {
+                'id': user_id, 'username': f'gen{user_id}',
+                'email': f'gen{user_id}@yamdb.fake', 'role': 'user',
+                'bio': '', 'first_name': 'Gen', 'last_name': str(user_id),
+            }
+
+    def category(self):
+        for category_id in self.ids(Category, self.size.categories):
+            yield {'id': category_id, 'name': f'Категория {category_id}',
+                   'slug': f'gen-category-{category_id}'}
+
+    def genre(self):
+        for genre_id in self.ids(Genre, self.size.genres):
+            yield {'id': genre_id, 'name': f'Жанр {genre_id}',
+                   'slug': f'gen-genre-{genre_id}'}
+
+    def titles(self):
+        rng = self.rng('titles')
+        categories = self.ids(Category, self.size.categories)
+        for title_id in self.ids(Title, self.size.titles):
+            yield {
+                'id': title_id, 'name': f'Произведение {title_id}',
+                'year': rng.randint(FIRST_YEAR, self.now.year),
+                'description': f'Описание произведения {title_id}',
+                'category': categories[
+                    skewed_index(rng, len(categories), self.skew)
+                ],
+            }
+
+    def genre_title(self):
+        rng = self.rng('genre_title')
+        genres = self.ids(Genre, self.size.genres)
+        link_id = self.first_ids[GenreTitle] + 1
+        for title_id in self.ids(Title, self.size.titles):
+            count = rng.randint(1, min(MAX_GENRES_PER_TITLE, len(genres)))
+            for genre_id in rng.sample(genres, count):
+                yield {'id': link_id, 'title_id': title_id,
+                       'genre_id': genre_id}
+                link_id += 1
+
+    def review(self):
+        """
+        Отзывы распределяются по произведениям по закону Ципфа. Авторы
+        у произведения не повторяются: ограничение (title, author).
+        """
+        rng = self.rng('review')
+        users = self.ids(User, self.size.users)
+        counts = allocate(
+            self.size.reviews, self.size.titles, len(users), self.skew, rng
+        )
+        review_id = self.first_ids[Review] + 1
+        titles = self.ids(Title, self.size.titles)
+        for title_id, count in zip(titles, counts):
+            # Оценки произведения разбросаны вокруг его «качества».
+            quality = rng.gauss(7, 1.5)
+            authors = distinct_authors(rng, len(users), count, self.skew)
+            for author in authors:
+                score = round(rng.gauss(quality, 1.5))
+                yield {
+                    'id': review_id, 'title_id': title_id,
+                    'text': f'Отзыв на произведение {title_id}',
+                    'author': users[author],
+                    'score': max(1, min(10, score)),
+                    'pub_date': self.pub_date(rng),
+                }
+                review_id += 1
+
+    def comments(self):
+        rng = self.rng('comments')
+        users = self.ids(User, self.size.users)
+        reviews = self.ids(Review, self.size.reviews)
+        for comment_id in self.ids(Comments, self.size.comments):
+            review_id = reviews[skewed_index(rng, len(reviews), self.skew)]
+            yield {
+                'id': comment_id, 'review_id': review_id,
+                'text': f'Комментарий к отзыву {review_id}',
+                'author': users[skewed_index(rng, len(users), self.skew)],
+                'pub_date': self.pub_date(rng),
+            }
+
+
+class DatasetImporter(CsvImporter):
+    """
+    Загрузка сгенерированных строк тем же путём, что и CSV. Ссылки
+    сгенерированы согласованно, поэтому множества id не строятся.
+    """
+
+    def is_resolved(self, spec, row):
+        return True
+
+
+def validate_size(size):
+    """Проверяет, что у каждой ссылки набора есть на что ссылаться."""
+    required = (
+        ('titles', 'categories'), ('titles', 'genres'),
+        ('reviews', 'titles'), ('reviews', 'users'),
+        ('comments', 'reviews'), ('comments', 'users'),
+    )
+    for table, referenced in required:
+        if getattr(size, table) and not getattr(size, referenced):
+            raise ValueError(f'Для {table} нужны {referenced}')
+    if size.reviews > size.titles * size.users:
+        raise ValueError(
+            f'{size.reviews} отзывов не помещаются в {size.titles} '
+            f'произведений при {size.users} авторах'
+        )
+
+
+def generate_dataset(size=DatasetSize(), seed=0, skew=DEFAULT_SKEW,
+                     days=DEFAULT_DAYS, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Генерирует и загружает набор данных пачками bulk_create. Возвращает
+    итератор результатов загрузки по таблицам; размеры проверяются
+    сразу, до загрузки первой таблицы.
+    """
+    validate_size(size)
+    generator = DatasetGenerator(size, seed=seed, skew=skew, days=days)
+    return load_dataset(generator, DatasetImporter(batch_size=batch_size))
+
+
+def load_dataset(generator, importer):
+    """
+    Загружает таблицы по очереди. Каждая таблица сбрасывает кэши после
+    своей фиксации, но между таблицами читатель мог закэшировать набор
+    частично (произведения без жанров и рейтингов), поэтому в конце
+    поколения сдвигаются ещё раз по всем моделям набора.
+    """
+    for spec in FILES:
+        yield importer.import_rows(spec, getattr(generator, spec.name)())
+    notify_bulk_change(
+        *(spec.model for spec in FILES), using=importer.using
+    )
+
+
+def seed_dataset(size=DatasetSize(), seed=0, **kwargs):
+    """Загружает набор целиком, возвращает число строк по таблицам."""
+    return {
+        result.name: result.rows
+        for result in generate_dataset(size, seed=seed, **kwargs)
+    }
@@ -0,0 +1,518 @@
+import csv
+import hashlib
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .bulk import notify_bulk_change
+from .management.commands.paths import (CATEGORY_PATH, COMMENTS_PATH,
+                                        GENRE_PATH, GENRE_TITLE_PATH,
+                                        REVIEW_PATH, TITLES_PATH, USERS_PATH)
+from .models import (Category, Comments, Genre, GenreTitle, ImportCheckpoint,
+                     Review, Title, User)
+from .rankings import refresh_rankings
+from .ratings import rebuild_title_ratings
+
+DEFAULT_BATCH_SIZE = 5000
+
+FileSpec = namedtuple(
+    'FileSpec',
+    ('name', 'path', 'model', 'build', 'references', 'splittable'),
+    defaults=(False,)
+)
+ImportResult = namedtuple(
+    'ImportResult', ('name', 'rows', 'skipped', 'seconds')
+)
+HASH_BLOCK_SIZE = 1024 * 1024
+SCAN_BLOCK_SIZE = 1024 * 1024
+# Модели, от которых зависят сводные таблицы рейтингов.
+RANKED_MODELS = (GenreTitle, Review)
+
+
+def build_user(row):
+    return User(
+        id=row['id'],
+        username=row['username'],
+        email=row['email'],
+        role=row['role'],
+        bio=row['bio'],
+        first_name=row['first_name'],
+        last_name=row['last_name'],
+        password=make_password(None),
+    )
+
+
+def build_category(row):
+    return Category(id=row['id'], name=row['name'], slug=row['slug'])
+
+
+def build_genre(row):
+    return Genre(id=row['id'], name=row['name'], slug=row['slug'])
+
+
+def build_title(row):
+    return Title(
+        id=row['id'],
+        name=row['name'],
+        year=row['year'],
+        description=row.get('description', ''),
+        category_id=row['category'],
+    )
+
+
+def build_genre_title(row):
+    return GenreTitle(
+        id=row['id'], title_id=row['title_id'], genre_id=row['genre_id']
+    )
+
+
+def build_review(row):
+    return Review(
+        id=row['id'],
+        title_id=row['title_id'],
+        text=row['text'],
+        author_id=row['author'],
+        score=row['score'],
+        pub_date=row['pub_date'],
+    )
+
+
+def build_comment(row):
+    return Comments(
+        id=row['id'],
+        review_id=row['review_id'],
+        text=row['text'],
+        author_id=row['author'],
+        pub_date=row['pub_date'],
+    )
+
+
+# Файлы перечислены в порядке зависимостей по внешним ключам.
+FILES = (
+    FileSpec('users', USERS_PATH, User, build_user, {}),
+    FileSpec('category', CATEGORY_PATH, Category, build_category, {}),
+    FileSpec('genre', GENRE_PATH, Genre, build_genre, {}),
+    FileSpec('titles', TITLES_PATH, Title, build_title,
+             {'category': Category}),
+    FileSpec('genre_title', GENRE_TITLE_PATH, GenreTitle, build_genre_title,
+             {'title_id': Title, 'genre_id': Genre}),
+    FileSpec('review', REVIEW_PATH, Review, build_review,
+             {'title_id': Title, 'author': User}, splittable=True),
+    FileSpec('comments', COMMENTS_PATH, Comments, build_comment,
+             {'review_id': Review, 'author': User}, splittable=True),
+)
+
+
+def dependencies(specs):
+    """Строит граф зависимостей файлов по внешним ключам моделей."""
+    loaded_by = {spec.model: spec.name for spec in specs}
+    return {
+        spec.name: {
+            loaded_by[model] for model in spec.references.values()
+            if model in loaded_by
+        }
+        for spec in specs
+    }
+
+
+def split_file(path, parts):
+    """
+    Делит файл после заголовка на parts диапазонов байт (start, end)
+    по границам записей. Перевод строки внутри кавычек запись не
+    заканчивает; чтобы не разбирать CSV, чётность кавычек до границы
+    считается по блокам, и граница сдвигается к концу строки, после
+    которого кавычек чётное число.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as csvfile:
+        csvfile.readline()
+        offsets = [csvfile.tell()]
+        position, quotes = offsets[0], 0
+        for index in range(1, parts):
+            target = size * index // parts
+            while position < target:
+                block = csvfile.read(min(SCAN_BLOCK_SIZE, target - position))
+                quotes += block.count(b'"')
+                position += len(block)
+            while position < size:
+                line = csvfile.readline()
+                quotes += line.count(b'"')
+                position += len(line)
+                if quotes % 2 == 0:
+                    break
+            offsets.append(position)
+    offsets.append(size)
+    return list(zip(offsets, offsets[1:]))
+
+
+def read_range(binary_file, start, end):
+    """Строки бинарного файла из диапазона байт [start, end)."""
+    binary_file.seek(start)
+    while start < end:
+        line = binary_file.readline()
+        if not line:
+            return
+        start += len(line)
+        yield line.decode('utf-8')
+
+
+def read_chunks(rows, batch_size):
+    """Разбивает поток строк CSV на списки длиной batch_size."""
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class OffsetReader:
+    """
+    Построчно отдаёт бинарный файл для csv.reader, отслеживая смещение
+    в байтах и хэш прочитанного с начала файла. Последняя строка без
+    перевода строки считается недописанной и не читается.
+    """
+
+    def __init__(self, binary_file):
+        self.file = binary_file
+        self.offset = 0
+        self.hash = hashlib.sha256()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.file.readline()
+        if not line.endswith(b'\n'):
+            self.file.seek(self.offset)
+            raise StopIteration
+        self.offset += len(line)
+        self.hash.update(line)
+        return line.decode('utf-8')
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+    def read_header(self):
+        return next(csv.reader([next(self)]))
+
+    def resume(self, offset, digest):
+        """
+        Переходит к смещению offset, если хэш файла до него совпадает
+        с digest. Иначе (файл переписан) остаётся в начале файла.
+        """
+        self.restart()
+        remaining = offset
+        while remaining > 0:
+            block = self.file.read(min(HASH_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            self.hash.update(block)
+            remaining -= len(block)
+        if remaining == 0 and self.hexdigest() == digest:
+            self.offset = offset
+            return True
+        self.restart()
+        return False
+
+    def restart(self):
+        self.file.seek(0)
+        self.offset = 0
+        self.hash = hashlib.sha256()
+
+
+@contextmanager
+def preserve_auto_now_add(model):
+    """
+    Отключает auto_now_add на время загрузки, чтобы сохранить даты
+    публикации из файла вместо текущего времени.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class CsvImporter:
+    """
+    Потоковая загрузка CSV пачками через bulk_create(ignore_conflicts=True).
+    Внешние ключи проверяются по множествам id в памяти, строки
+    с несуществующими ссылками пропускаются.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE,
+                 using=DEFAULT_DB_ALIAS, incremental=False):
+        self.batch_size = batch_size
+        self.using = using
+        self.incremental = incremental
+        self.id_maps = {}
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def get_ids(self, model):
+        if model not in self.id_maps:
+            self.id_maps[model] = set(
+                model.objects.using(self.using).values_list('id', flat=True)
+            )
+        return self.id_maps[model]
+
+    def is_resolved(self, spec, row):
+        return all(
+            row[column].isdigit() and int(row[column]) in self.get_ids(model)
+            for column, model in spec.references.items()
+        )
+
+    def insert_chunk(self, spec, chunk):
+        """Загружает пачку строк и возвращает число пропущенных."""
+        objects = [
+            spec.build(row) for row in chunk if self.is_resolved(spec, row)
+        ]
+        spec.model.objects.using(self.using).bulk_create(
+            objects, batch_size=self.batch_size, ignore_conflicts=True
+        )
+        return len(chunk) - len(objects)
+
+    def defer_constraints(self):
+        if self.connection.vendor == 'postgresql':
+            with self.connection.cursor() as cursor:
+                cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+
+    def reset_sequences(self, model):
+        """После вставки явных id сдвигает последовательность Postgres."""
+        statements = self.connection.ops.sequence_reset_sql(
+            no_style(), [model]
+        )
+        with self.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def import_rows(self, spec, rows, finalize=True):
+        rows_count = skipped = 0
+        started = time.monotonic()
+        atomic = transaction.atomic(using=self.using)
+        with atomic, preserve_auto_now_add(spec.model):
+            self.defer_constraints()
+            for chunk in read_chunks(rows, self.batch_size):
+                skipped += self.insert_chunk(spec, chunk)
+                rows_count += len(chunk)
+            if finalize:
+                self.finalize(spec)
+        # Часть строк могла не вставиться из-за конфликтов, поэтому
+        # множество id модели перечитывается при следующем обращении.
+        self.id_maps.pop(spec.model, None)
+        return ImportResult(
+            spec.name, rows_count, skipped, time.monotonic() - started
+        )
+
+    def import_incremental(self, spec, finalize=True):
+        """
+        Загружает только строки после сохранённой контрольной точки.
+        Каждая пачка фиксируется вместе с новой контрольной точкой,
+        поэтому прерванная загрузка продолжается с последней пачки.
+        Контрольная точка помнит, что завершение (пересчёт рейтингов
+        и сброс кэшей) ещё не выполнено, и произведения из уже
+        зафиксированных пачек: продолженная загрузка завершает и их.
+        """
+        checkpoint, _ = ImportCheckpoint.objects.using(
+            self.using
+        ).get_or_create(name=spec.name)
+        rows_count = skipped = 0
+        title_ids = set(checkpoint.pending_titles)
+        started = time.monotonic()
+        auto_now_add = preserve_auto_now_add(spec.model)
+        with open(spec.path, 'rb') as csvfile, auto_now_add:
+            reader = OffsetReader(csvfile)
+            fieldnames = reader.read_header()
+            if not reader.resume(checkpoint.offset, checkpoint.digest):
+                reader.read_header()
+                checkpoint.rows = 0
+            rows = csv.DictReader(reader, fieldnames=fieldnames)
+            for chunk in read_chunks(rows, self.batch_size):
+                if spec.model is Review:
+                    title_ids.update(int(row['title_id']) for row in chunk
+                                     if row['title_id'].isdigit())
+                with transaction.atomic(using=self.using):
+                    self.defer_constraints()
+                    skipped += self.insert_chunk(spec, chunk)
+                    checkpoint.offset = reader.offset
+                    checkpoint.digest = reader.hexdigest()
+                    checkpoint.rows += len(chunk)
+                    checkpoint.finalize_pending = True
+                    checkpoint.pending_titles = sorted(title_ids)
+                    checkpoint.save(using=self.using)
+                rows_count += len(chunk)
+        self.id_maps.pop(spec.model, None)
+        if finalize and checkpoint.finalize_pending:
+            with transaction.atomic(using=self.using):
+                self.finalize(spec, title_ids)
+                checkpoint.finalize_pending = False
+                checkpoint.pending_titles = []
+                checkpoint.save(using=self.using)
+        return ImportResult(
+            spec.name, rows_count, skipped, time.monotonic() - started
+        )
+
+    def finalize(self, spec, title_ids=None):
+        """
+        Действия после загрузки всех строк файла. title_ids ограничивает
+        пересчёт рейтингов произведениями из загруженной части.
+        """
+        self.reset_sequences(spec.model)
+        # Сигналы при bulk_create не отправляются, поэтому хранимые
+        # рейтинги пересчитываются после загрузки отзывов, а кэши,
+        # словари слагов и валидаторы ответов сбрасываются явно.
+        if spec.model is Review:
+            titles = Title.objects.using(self.using)
+            if title_ids is not None:
+                titles = titles.filter(pk__in=title_ids)
+            rebuild_title_ratings(titles)
+        if spec.model in RANKED_MODELS:
+            refresh_rankings(using=self.using)
+        notify_bulk_change(spec.model, using=self.using)
+
+    def import_file(self, spec, part=None, finalize=True):
+        """
+        Загружает файл целиком или часть part - диапазон байт (start, end)
+        из split_file: читается и разбирается только этот диапазон.
+        """
+        if self.incremental:
+            return self.import_incremental(spec, finalize=finalize)
+        if part is None:
+            with open(spec.path, 'r', encoding='utf-8',
+                      newline='') as csvfile:
+                rows = csv.DictReader(csvfile)
+                return self.import_rows(spec, rows, finalize=finalize)
+        with open(spec.path, 'rb') as csvfile:
+            fieldnames = next(csv.reader([
+                csvfile.readline().decode('utf-8')
+            ]))
+            rows = csv.DictReader(
+                read_range(csvfile, *part), fieldnames=fieldnames
+            )
+            return self.import_rows(spec, rows, finalize=finalize)
+
+    def import_all(self, specs=FILES):
+        for spec in specs:
+            yield self.import_file(spec)
+
+
+class CsvPartImporter(CsvImporter):
+    """
+    Загрузка части файла в процессе пула. Множества id для проверки
+    ссылок строятся по каждой пачке только из её значений, поэтому
+    процесс не держит в памяти все id связанных таблиц.
+    """
+
+    def insert_chunk(self, spec, chunk):
+        for column, model in spec.references.items():
+            referenced = {
+                int(row[column]) for row in chunk if row[column].isdigit()
+            }
+            self.id_maps[model] = set(
+                model.objects.using(self.using).filter(
+                    id__in=referenced
+                ).values_list('id', flat=True)
+            )
+        return super().insert_chunk(spec, chunk)
+
+
+def import_part(spec, batch_size, using, part, incremental=False):
+    """
+    Загружает файл или его часть в процессе пула со своим подключением
+    к БД. Файл целиком завершается здесь же, части - в основном процессе.
+    """
+    importer_class = CsvImporter if part is None else CsvPartImporter
+    importer = importer_class(
+        batch_size=batch_size, using=using, incremental=incremental
+    )
+    try:
+        return importer.import_file(
+            spec, part=part, finalize=part is None
+        )
+    finally:
+        connections.close_all()
+
+
+class ParallelCsvImporter(CsvImporter):
+    """
+    Загружает независимые файлы одновременно в пуле процессов, соблюдая
+    порядок зависимостей. Большие файлы (отзывы, комментарии) можно
+    разбить на parts частей, которые загружаются параллельно.
+    """
+
+    def __init__(self, workers, parts=1, **kwargs):
+        super().__init__(**kwargs)
+        self.workers = workers
+        self.parts = parts
+
+    def submit(self, pool, spec):
+        # Инкрементальная загрузка идёт по смещению, поэтому файл
+        # с контрольной точкой на части не делится.
+        parts = self.parts if spec.splittable and not self.incremental else 1
+        ranges = split_file(spec.path, parts) if parts > 1 else [None]
+        return [
+            pool.submit(
+                import_part, spec, self.batch_size, self.using, part,
+                self.incremental
+            )
+            for part in ranges
+        ]
+
+    def import_all(self, specs=FILES):
+        specs_by_name = {spec.name: spec for spec in specs}
+        waiting = dependencies(specs)
+        done = set()
+        running = {}
+        progress = {}
+        # Дочерние процессы не должны наследовать открытые подключения.
+        connections.close_all()
+        with ProcessPoolExecutor(
+                max_workers=self.workers, initializer=django.setup) as pool:
+            while waiting or running:
+                ready = [
+                    name for name, required in waiting.items()
+                    if required <= done
+                ]
+                if not ready and not running:
+                    raise ValueError(
+                        f'Неразрешимые зависимости файлов: {waiting}'
+                    )
+                for name in ready:
+                    del waiting[name]
+                    futures = self.submit(pool, specs_by_name[name])
+                    progress[name] = ([], len(futures), time.monotonic())
+                    running.update((future, name) for future in futures)
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    results, parts, started = progress[name]
+                    results.append(future.result())
+                    if len(results) < parts:
+                        continue
+                    if parts > 1:
+                        with transaction.atomic(using=self.using):
+                            self.finalize(specs_by_name[name])
+                        connections.close_all()
+                    done.add(name)
+                    yield ImportResult(
+                        name,
+                        sum(result.rows for result in results),
+                        sum(result.skipped for result in results),
+                        time.monotonic() - started,
+                    )
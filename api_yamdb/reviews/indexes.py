@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import Review, Title
+
+# Индексы, которые нельзя описать в Meta.indexes без привязки к Postgres:
+# выражение совпадает с тем, во что Django компилирует icontains.
+TRIGRAM_INDEXES = (
+    ('title_name_trgm_idx', Title._meta.db_table, 'UPPER("name"::text)'),
+)
+SEARCH_INDEXES = (
+    ('title_search_vector_idx', Title._meta.db_table),
+    ('review_search_vector_idx', Review._meta.db_table),
+)
+# Поля tsvector с весами, которые поддерживают триггеры.
+SEARCH_DOCUMENTS = (
+    (Title._meta.db_table, (('name', 'A'), ('description', 'B'))),
+    (Review._meta.db_table, (('text', 'A'),)),
+)
+
+
+def create_postgres_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Создаёт расширение pg_trgm и триграммные GIN-индексы после migrate.
+    На других СУБД ничего не делает; повторный запуск безопасен.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, table, expression in TRIGRAM_INDEXES:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+                f'USING gin ({expression} gin_trgm_ops)'
+            )
+
+
+def search_document_sql(columns):
+    return ' || '.join(
+        f"setweight(to_tsvector('{settings.SEARCH_CONFIG}', "
+        f"coalesce(NEW.{column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def create_search_triggers(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Создаёт триггеры, заполняющие search_vector при вставке и изменении
+    текста (в том числе при bulk_create), GIN-индексы по ним и заполняет
+    пустые значения. Только для Postgres, повторный запуск безопасен.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for table, columns in SEARCH_DOCUMENTS:
+            names = ', '.join(column for column, _ in columns)
+            cursor.execute(
+                f'CREATE OR REPLACE FUNCTION {table}_search_vector() '
+                f'RETURNS trigger AS $$ BEGIN '
+                f'NEW.search_vector := {search_document_sql(columns)}; '
+                f'RETURN NEW; END $$ LANGUAGE plpgsql'
+            )
+            cursor.execute(
+                f'DROP TRIGGER IF EXISTS {table}_search_vector_trigger '
+                f'ON {table}'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER {table}_search_vector_trigger '
+                f'BEFORE INSERT OR UPDATE OF {names} ON {table} '
+                f'FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()'
+            )
+            first_column = columns[0][0]
+            cursor.execute(
+                f'UPDATE {table} SET {first_column} = {first_column} '
+                f'WHERE search_vector IS NULL'
+            )
+        for name, table in SEARCH_INDEXES:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+                f'USING gin (search_vector)'
+            )
@@ -0,0 +1,70 @@
+from django.core.management import BaseCommand, CommandError
+
+from reviews.dataset import (DEFAULT_DAYS, DEFAULT_SKEW, DatasetSize,
+                             generate_dataset)
+from reviews.importers import DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    """Класс генерации синтетических данных для нагрузочных замеров"""
+
+    help = (
+        "Generate a synthetic dataset with skewed popularity and load it "
+        "through the bulk import path."
+    )
+
+    def add_arguments(self, parser):
+        for field, default in DatasetSize._field_defaults.items():
+            parser.add_argument(
+                f'--{field}',
+                type=int,
+                default=default,
+                help=f'Number of {field} to generate (default {default}).'
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed: the same seed yields the same dataset.'
+        )
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=DEFAULT_SKEW,
+            help=('Popularity skew of titles, authors and categories: '
+                  '0 is uniform, larger values concentrate activity.')
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=DEFAULT_DAYS,
+            help='Spread publication dates over this many past days.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of rows inserted by one bulk_create.'
+        )
+
+    def handle(self, *args, **options):
+        size = DatasetSize(**{
+            field: options[field] for field in DatasetSize._fields
+        })
+        try:
+            results = generate_dataset(
+                size,
+                seed=options['seed'],
+                skew=options['skew'],
+                days=options['days'],
+                batch_size=options['batch_size'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        for result in results:
+            rate = result.rows / result.seconds if result.seconds else 0
+            self.stdout.write(
+                f'{result.name}: {result.rows} rows, '
+                f'{result.seconds:.2f}s ({rate:.0f} rows/s)'
+            )
+        self.stdout.write(self.style.SUCCESS('Dataset generated!'))
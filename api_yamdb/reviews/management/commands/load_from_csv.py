@@ -1,14 +1,8 @@
-import csv
-
 from django.core.management import BaseCommand
+from django.db import connection
 
-from reviews.models import User, GenreTitle, Categories, Genre, Title, Review
-from reviews.models import Comments
-
-from .paths import USERS_PATH, CATEGORY_PATH, GENRE_PATH, TITLES_PATH
-from .paths import GENRE_TITLE_PATH, REVIEW_PATH, COMMENTS_PATH
-
-CSV_PATH = 'static/data/'
+from reviews.importers import (DEFAULT_BATCH_SIZE, CsvImporter,
+                               ParallelCsvImporter)
 
 
 class Command(BaseCommand):
@@ -16,74 +10,59 @@ class Command(BaseCommand):
 
     help = "Loading data from csv file"
 
-    def handle(self, *args, **options):
-
-        with open(USERS_PATH, 'r', encoding='utf-8') as csvfile:
-            dict_reader = csv.DictReader(csvfile)
-            for row in dict_reader:
-                User.objects.get_or_create(
-                    id=row['id'],
-                    username=row['username'],
-                    email=row['email'],
-                    role=row['role'],
-                    bio=row['bio'],
-                    first_name=row['first_name'],
-                    last_name=row['last_name']
-                )
-
-        with open(CATEGORY_PATH, 'r',
-                  encoding='utf-8') as csvfile:
-            dict_reader = csv.DictReader(csvfile)
-            for row in dict_reader:
-                Categories.objects.get_or_create(
-                    name=row['name'],
-                    slug=row['slug']
-                )
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of rows inserted by one bulk_create.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Load independent files in a pool of worker processes.'
+        )
+        parser.add_argument(
+            '--parts',
+            type=int,
+            default=1,
+            help='Split reviews and comments into parts loaded in parallel.'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help=('Load only rows appended since the last run and resume '
+                  'interrupted imports from the last committed chunk.')
+        )
 
-        with open(GENRE_PATH, 'r', encoding='utf-8') as csvfile:
-            dict_reader = csv.DictReader(csvfile)
-            for row in dict_reader:
-                Genre.objects.get_or_create(
-                    name=row['name'],
-                    slug=row['slug']
-                )
-
-        with open(TITLES_PATH, 'r', encoding='utf-8') as csvfile:
-            dict_reader = csv.DictReader(csvfile)
-            for row in dict_reader:
-                Title.objects.get_or_create(
-                    name=row['name'],
-                    year=row['year'],
-                    category_id=row['category']
-                )
-
-        with open(GENRE_TITLE_PATH) as csvfile:
-            dict_reader = csv.DictReader(csvfile)
-            for row in dict_reader:
-                GenreTitle.title = GenreTitle.objects.get(id=row['title_id'])
-                GenreTitle.genre = GenreTitle.objects.get(id=row['genre_id'])
-
-        with open(REVIEW_PATH, 'r', encoding='utf-8') as csvfile:
-            dict_reader = csv.DictReader(csvfile)
-            for row in dict_reader:
-                Review.objects.get_or_create(
-                    id=row['id'],
-                    title=row['title_id'],
-                    text=row['text'],
-                    author_id=row['author'],
-                    score=row['score'],
-                    pub_date=row['pub_date']
-                )
-
-        with open(COMMENTS_PATH, 'r',
-                  encoding='utf-8') as csvfile:
-            dict_reader = csv.DictReader(csvfile)
-            for row in dict_reader:
-                Comments.objects.get_or_create(
-                    review_id=row['review_id'],
-                    text=row['text'],
-                    author_id=row['author'],
-                    pub_date=row['pub_date']
-                )
+    def handle(self, *args, **options):
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite does not support concurrent writers, '
+                'loading files sequentially.'
+            ))
+            options['workers'] = 1
+        if options['workers'] > 1:
+            importer = ParallelCsvImporter(
+                workers=options['workers'],
+                parts=options['parts'],
+                batch_size=options['batch_size'],
+                incremental=options['incremental'],
+            )
+        else:
+            importer = CsvImporter(
+                batch_size=options['batch_size'],
+                incremental=options['incremental'],
+            )
+        for result in importer.import_all():
+            self.write_result(result)
 
         self.stdout.write(self.style.SUCCESS('Database loaded successfully!'))
+
+    def write_result(self, result):
+        rate = result.rows / result.seconds if result.seconds else 0
+        self.stdout.write(
+            f'{result.name}: {result.rows} rows, {result.skipped} skipped, '
+            f'{result.seconds:.2f}s ({rate:.0f} rows/s)'
+        )
@@ -0,0 +1,17 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from reviews.ratings import rebuild_title_ratings
+
+
+class Command(BaseCommand):
+    """Класс пересчёта хранимых рейтингов произведений"""
+
+    help = "Rebuilding stored title ratings from reviews"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_title_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Ratings rebuilt for {updated} titles!')
+        )
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from reviews.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    """Класс обновления сводных таблиц рейтингов"""
+
+    help = "Refreshing title rankings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep refreshing rankings instead of exiting after one run.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.RANKING_REFRESH_INTERVAL,
+            help='Seconds between refreshes in --loop mode.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            refreshed = refresh_rankings()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Rankings refreshed for {refreshed} titles'
+                )
+            )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
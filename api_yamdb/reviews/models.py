@@ -1,5 +1,6 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from users.models import User
 
 from .utils import year_validate
@@ -43,6 +44,12 @@ class Genre(models.Model):
         return self.name
 
 
+# Гистограмма оценок произведения: по счётчику score_<оценка> на каждую
+# оценку в модели Title.
+SCORES = range(1, 11)
+SCORE_FIELDS = {score: f'score_{score}' for score in SCORES}
+
+
 class Title(models.Model):
     """Модель произведений, к которым пишут отзывы"""
 
@@ -71,13 +78,94 @@ class Title(models.Model):
         through_fields=('title', 'genre'),
         verbose_name='Жанр'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов'
+    )
+    rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name='Рейтинг'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False
+    )
+    # Гистограмма оценок, поля перечислены в SCORE_FIELDS.
+    score_1 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 1'
+    )
+    score_2 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 2'
+    )
+    score_3 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 3'
+    )
+    score_4 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 4'
+    )
+    score_5 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 5'
+    )
+    score_6 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 6'
+    )
+    score_7 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 7'
+    )
+    score_8 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 8'
+    )
+    score_9 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 9'
+    )
+    score_10 = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Оценок 10'
+    )
 
     class Meta:
         ordering = ['-id', ]
+        indexes = (
+            models.Index(fields=('year',), name='title_year_idx'),
+        )
 
     def __str__(self):
         return self.name
 
+    @property
+    def score_histogram(self):
+        """Число отзывов с каждой оценкой."""
+        return {
+            score: getattr(self, field)
+            for score, field in SCORE_FIELDS.items()
+        }
+
 
 class GenreTitle(models.Model):
     """Модель отношения Произведение-Жанр"""
@@ -93,6 +181,16 @@ class GenreTitle(models.Model):
         verbose_name='Жанр'
     )
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('title', 'genre'), name='genretitle_title_genre_idx'
+            ),
+            models.Index(
+                fields=('genre', 'title'), name='genretitle_genre_title_idx'
+            ),
+        )
+
 
 class Review(models.Model):
     """Модель отзывов на произведения"""
@@ -111,7 +209,8 @@ class Review(models.Model):
         verbose_name='Автор'
     )
     score = models.PositiveSmallIntegerField(
-        validators=[MinValueValidator(1), MaxValueValidator(10)],
+        validators=[MinValueValidator(min(SCORES)),
+                    MaxValueValidator(max(SCORES))],
         default=1,
         verbose_name='Оценка'
     )
@@ -119,14 +218,30 @@ class Review(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ['-pub_date']
         unique_together = ('title', 'author',)
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        # Счётчики рейтинга произведения обновляются в сигналах,
+        # поэтому они должны попасть в одну транзакцию с отзывом.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 class Comments(models.Model):
     """Модель комментариев к отзывам"""
@@ -151,6 +266,137 @@ class Comments(models.Model):
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text
+
+
+class ImportCheckpoint(models.Model):
+    """Модель отметки о загруженной части csv файла"""
+
+    name = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='Файл'
+    )
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Смещение в байтах'
+    )
+    digest = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='Хэш загруженной части'
+    )
+    rows = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Загружено строк'
+    )
+    finalize_pending = models.BooleanField(
+        default=False,
+        verbose_name='Загрузка не завершена'
+    )
+    pending_titles = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Произведения для пересчёта рейтингов'
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата обновления'
+    )
+
+    def __str__(self):
+        return f'{self.name}: {self.offset}'
+
+
+class Ranking(models.Model):
+    """Общие поля сводных таблиц рейтингов"""
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Произведение'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Категория'
+    )
+    rating = models.FloatField(verbose_name='Рейтинг')
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов'
+    )
+    recent_reviews = models.PositiveIntegerField(
+        verbose_name='Отзывов за последние дни'
+    )
+    trending = models.FloatField(verbose_name='Популярность')
+
+    class Meta:
+        abstract = True
+
+
+class TitleRanking(Ranking):
+    """
+    Сводная таблица рейтингов произведений, которые уже оценивали.
+    Пересчитывается командой refresh_rankings; индексы позволяют
+    читать страницу рейтинга без агрегации отзывов.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name='Произведение'
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг произведения'
+        verbose_name_plural = 'Рейтинги произведений'
+        indexes = (
+            models.Index(fields=('-rating', 'title'),
+                         name='ranking_rating_idx'),
+            models.Index(fields=('-trending', 'title'),
+                         name='ranking_trending_idx'),
+            models.Index(fields=('-recent_reviews', 'title'),
+                         name='ranking_recent_idx'),
+            models.Index(fields=('category', '-rating', 'title'),
+                         name='ranking_category_rating_idx'),
+            models.Index(fields=('category', '-trending', 'title'),
+                         name='ranking_category_trending_idx'),
+            models.Index(fields=('category', '-recent_reviews', 'title'),
+                         name='ranking_category_recent_idx'),
+        )
+
+
+class GenreRanking(Ranking):
+    """Сводная таблица рейтингов произведений внутри жанра"""
+
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Жанр'
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг в жанре'
+        verbose_name_plural = 'Рейтинги в жанрах'
+        unique_together = ('genre', 'title',)
+        indexes = (
+            models.Index(fields=('genre', '-rating', 'title'),
+                         name='ranking_genre_rating_idx'),
+            models.Index(fields=('genre', '-trending', 'title'),
+                         name='ranking_genre_trending_idx'),
+            models.Index(fields=('genre', '-recent_reviews', 'title'),
+                         name='ranking_genre_recent_idx'),
+        )
@@ -0,0 +1,185 @@
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import GenreRanking, GenreTitle, Review, Title, TitleRanking
+
+# Порядки рейтинга: параметр order -> поле сводной таблицы.
+RANKING_ORDERS = {
+    'rating': 'rating',
+    'trending': 'trending',
+    'reviews': 'recent_reviews',
+}
+REFRESH_LOCK_ID = 'reviews.rankings.refresh'
+# Поля, которые GenreRanking копирует из TitleRanking.
+RANKING_FIELDS = ('category_id', 'rating', 'review_count', 'recent_reviews',
+                  'trending')
+
+# Отправляется после фиксации обновлённых таблиц рейтингов.
+rankings_refreshed = Signal()
+
+
+def decay(age, half_life):
+    """Вес отзыва возраста age: вдвое меньше за каждый период half_life."""
+    return 0.5 ** (max(age, timedelta(0)) / half_life)
+
+
+def recent_activity(since, now, half_life, using=DEFAULT_DB_ALIAS):
+    """
+    Отзывы за окно since..now по произведениям: количество и
+    популярность — сумма оценок/10, затухающих с возрастом отзыва.
+    Читает только отзывы окна, потоком без загрузки моделей.
+    """
+    counts = defaultdict(int)
+    trending = defaultdict(float)
+    reviews = Review.objects.using(using).filter(
+        pub_date__gte=since
+    ).values_list('title_id', 'score', 'pub_date')
+    for title_id, score, pub_date in reviews.iterator():
+        counts[title_id] += 1
+        trending[title_id] += score / 10 * decay(now - pub_date, half_life)
+    return counts, trending
+
+
+def lock_refresh(using=DEFAULT_DB_ALIAS):
+    """
+    Не даёт двум обновлениям идти одновременно: на Postgres второе
+    ждёт первое на advisory-блокировке до конца транзакции.
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_xact_lock(hashtext(%s))',
+                [REFRESH_LOCK_ID]
+            )
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def sync_title_rankings(counts, trending, using, batch_size):
+    """
+    Сверяет TitleRanking с произведениями пачками по batch_size:
+    записываются только новые и изменившиеся строки, строки
+    произведений, которые выпали из рейтинга, удаляются. Возвращает
+    число строк рейтинга и id произведений с изменёнными строками.
+    """
+    rankings = TitleRanking.objects.using(using)
+    rated = Title.objects.using(using).filter(
+        review_count__gt=0, rating__isnull=False
+    ).order_by('pk').values_list('id', 'category_id', 'rating',
+                                 'review_count')
+    ranked, changed = 0, []
+    for batch in batches(rated.iterator(chunk_size=batch_size), batch_size):
+        existing = rankings.in_bulk([row[0] for row in batch])
+        created, updated = [], []
+        for title_id, category_id, rating, review_count in batch:
+            values = {
+                'category_id': category_id,
+                'rating': rating,
+                'review_count': review_count,
+                'recent_reviews': counts.get(title_id, 0),
+                'trending': trending.get(title_id, 0.0),
+            }
+            ranking = existing.get(title_id)
+            if ranking is None:
+                created.append(TitleRanking(title_id=title_id, **values))
+            elif any(getattr(ranking, field) != value
+                     for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(ranking, field, value)
+                updated.append(ranking)
+            else:
+                continue
+            changed.append(title_id)
+        rankings.bulk_create(created)
+        rankings.bulk_update(updated, RANKING_FIELDS)
+        ranked += len(batch)
+    rankings.filter(
+        Q(title__review_count=0) | Q(title__rating__isnull=True)
+    ).delete()
+    return ranked, changed
+
+
+def sync_genre_rankings(changed, using, batch_size):
+    """
+    Сверяет GenreRanking со связями жанров и TitleRanking: удаляет
+    строки исчезнувших связей и произведений, обновляет строки
+    изменившихся произведений одним UPDATE на пачку и добавляет
+    строки новых связей.
+    """
+    genre_rankings = GenreRanking.objects.using(using)
+    title_rankings = TitleRanking.objects.using(using)
+    genre_rankings.filter(
+        ~Exists(GenreTitle.objects.filter(
+            title=OuterRef('title'), genre=OuterRef('genre')
+        ))
+        | ~Exists(title_rankings.filter(title=OuterRef('title')))
+    ).delete()
+    ranking = title_rankings.filter(title=OuterRef('title'))
+    for batch in batches(changed, batch_size):
+        genre_rankings.filter(title_id__in=batch).update(**{
+            field: Subquery(ranking.values(field)[:1])
+            for field in RANKING_FIELDS
+        })
+    missing = GenreTitle.objects.using(using).filter(
+        Exists(title_rankings.filter(title=OuterRef('title')))
+    ).exclude(
+        Exists(GenreRanking.objects.filter(
+            title=OuterRef('title'), genre=OuterRef('genre')
+        ))
+    ).values_list('title_id', 'genre_id')
+    for batch in batches(missing.iterator(chunk_size=batch_size),
+                         batch_size):
+        titles = title_rankings.in_bulk({title_id for title_id, _ in batch})
+        genre_rankings.bulk_create(
+            GenreRanking(
+                title_id=title_id,
+                genre_id=genre_id,
+                **{
+                    field: getattr(titles[title_id], field)
+                    for field in RANKING_FIELDS
+                }
+            )
+            for title_id, genre_id in batch
+        )
+
+
+def refresh_rankings(now=None, using=DEFAULT_DB_ALIAS):
+    """
+    Обновляет сводные таблицы рейтингов одной транзакцией на базе
+    using (по умолчанию основной, а не реплике). Читатели до её
+    фиксации видят прежние строки целиком, поэтому обновление не
+    блокирует эндпоинт рейтингов. Произведения читаются пачками, и
+    перезаписываются только изменившиеся строки. В таблицы попадают
+    только произведения с отзывами. Возвращает число строк TitleRanking.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=settings.RANKING_RECENT_DAYS)
+    half_life = timedelta(hours=settings.RANKING_HALF_LIFE_HOURS)
+    batch_size = settings.RANKING_BATCH_SIZE
+    with transaction.atomic(using=using):
+        lock_refresh(using)
+        counts, trending = recent_activity(since, now, half_life, using)
+        ranked, changed = sync_title_rankings(
+            counts, trending, using, batch_size
+        )
+        sync_genre_rankings(changed, using, batch_size)
+        transaction.on_commit(
+            lambda: rankings_refreshed.send(sender=TitleRanking),
+            using=using
+        )
+    return ranked
@@ -0,0 +1,126 @@
+import math
+
+from django.db import connections
+from django.db.models import (Avg, Case, Count, Exists, F, FloatField,
+                              OuterRef, Q, Sum, When)
+from django.db.models.functions import Cast
+
+from .bulk import notify_bulk_change
+from .models import SCORE_FIELDS, Review, Title
+
+PERCENTILES = (0.25, 0.75, 0.9)
+
+
+def update_title_rating(title_id, added=None, removed=None):
+    """
+    Инкрементально изменяет хранимые счётчики оценок произведения:
+    added — оценка появившегося отзыва, removed — исчезнувшего.
+    Сумма, количество, рейтинг и гистограмма пересчитываются одним
+    UPDATE: в правой части выражений Postgres и SQLite используют
+    значения строки до обновления.
+    """
+    score_delta = (added or 0) - (removed or 0)
+    count_delta = (added is not None) - (removed is not None)
+    rating_sum = F('rating_sum') + score_delta
+    review_count = F('review_count') + count_delta
+    histogram = {}
+    if added != removed:
+        if added is not None:
+            histogram[SCORE_FIELDS[added]] = F(SCORE_FIELDS[added]) + 1
+        if removed is not None:
+            histogram[SCORE_FIELDS[removed]] = F(SCORE_FIELDS[removed]) - 1
+    return Title.objects.filter(pk=title_id).update(
+        rating_sum=rating_sum,
+        review_count=review_count,
+        rating=Case(
+            When(review_count=-count_delta, then=None),
+            default=Cast(rating_sum, FloatField()) / review_count,
+            output_field=FloatField(),
+        ),
+        **histogram
+    )
+
+
+def rebuild_title_ratings(titles=None):
+    """
+    Полностью пересчитывает рейтинги произведений по таблице отзывов.
+    Используется для восстановления счётчиков после массовой загрузки.
+    Отзывы агрегируются одним GROUP BY title_id, результат соединяется
+    с произведениями в одном UPDATE ... FROM; произведения без отзывов
+    обнуляются вторым UPDATE. UPDATE не отправляет сигналов, поэтому
+    об изменении произведений сообщает bulk_changed. Возвращает число
+    обновлённых произведений.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    connection = connections[titles.db]
+    reviews = Review.objects.using(titles.db).filter(
+        title__in=titles.values('pk')
+    )
+    aggregate = reviews.order_by().values('title').annotate(
+        rating_sum=Sum('score'),
+        review_count=Count('pk'),
+        rating=Avg('score'),
+        **{
+            field: Count('pk', filter=Q(score=score))
+            for score, field in SCORE_FIELDS.items()
+        }
+    )
+    aggregate_sql, params = aggregate.query.get_compiler(
+        using=titles.db
+    ).as_sql()
+    quote = connection.ops.quote_name
+    table = quote(Title._meta.db_table)
+    columns = ('rating_sum', 'review_count', 'rating', *SCORE_FIELDS.values())
+    assignments = ', '.join(
+        f'{quote(column)} = ratings.{quote(column)}' for column in columns
+    )
+    notify_bulk_change(Title, using=titles.db)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET {assignments} '
+            f'FROM ({aggregate_sql}) AS ratings '
+            f'WHERE {table}.{quote("id")} = ratings.{quote("title_id")}',
+            params
+        )
+        updated = cursor.rowcount
+    return updated + titles.exclude(
+        Exists(reviews.filter(title=OuterRef('pk')))
+    ).update(
+        rating_sum=0,
+        review_count=0,
+        rating=None,
+        **dict.fromkeys(SCORE_FIELDS.values(), 0)
+    )
+
+
+def score_percentile(histogram, share):
+    """
+    Оценка, не выше которой share всех отзывов (метод ближайшего ранга).
+    Считается по десяти счётчикам гистограммы без чтения отзывов.
+    """
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = max(1, math.ceil(share * total))
+    seen = 0
+    for score in sorted(histogram):
+        seen += histogram[score]
+        if seen >= rank:
+            return score
+    return None
+
+
+def score_statistics(title):
+    """Распределение оценок произведения и статистики по нему."""
+    histogram = title.score_histogram
+    return {
+        'count': title.review_count,
+        'rating': title.rating,
+        'median': score_percentile(histogram, 0.5),
+        'percentiles': {
+            f'p{int(share * 100)}': score_percentile(histogram, share)
+            for share in PERCENTILES
+        },
+        'distribution': histogram,
+    }
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Review
+from .ratings import update_title_rating
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, raw, **kwargs):
+    """Запоминает прежнюю оценку отзыва перед его изменением."""
+    instance._previous_score = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_score = Review.objects.filter(
+        pk=instance.pk
+    ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    """Обновляет счётчики рейтинга при создании и изменении отзыва."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_score', None)
+    if created or previous is None:
+        update_title_rating(instance.title_id, added=instance.score)
+        return
+    previous_title_id, previous_score = previous
+    if previous_title_id != instance.title_id:
+        update_title_rating(previous_title_id, removed=previous_score)
+        update_title_rating(instance.title_id, added=instance.score)
+    elif previous_score != instance.score:
+        update_title_rating(
+            instance.title_id, added=instance.score, removed=previous_score
+        )
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Обновляет счётчики рейтинга при удалении отзыва."""
+    update_title_rating(instance.title_id, removed=instance.score)
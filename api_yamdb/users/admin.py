@@ -2,7 +2,7 @@ from django.contrib import admin
 
 from api_yamdb.settings import LIST_PER_PAGE
 
-from .models import User
+from .models import OutboxEmail, User
 
 
 @admin.register(User)
@@ -20,6 +20,25 @@ class UserAdmin(admin.ModelAdmin):
     )
     empty_value_display = 'значение отсутствует!'
     list_editable = ('role',)
-    list_filter = ('username',)
+    list_filter = ('role',)
     list_per_page = LIST_PER_PAGE
     search_fields = ('username', 'role')
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Класс настройки очереди писем."""
+
+    list_display = (
+        'pk',
+        'recipient',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt',
+        'sent'
+    )
+    list_filter = ('status',)
+    list_per_page = LIST_PER_PAGE
+    search_fields = ('recipient',)
+    readonly_fields = ('created', 'sent', 'last_error')
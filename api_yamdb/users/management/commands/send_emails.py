@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from users.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    """Класс отправки писем из очереди"""
+
+    help = "Sending queued emails"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Number of emails locked and sent in one transaction.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when it is empty.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds between queue polls in --loop mode.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = deliver_pending(batch_size=options['batch_size'])
+            if sent or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Processed {sent} queued emails')
+                )
+            if not options['loop']:
+                return
+            if not sent:
+                time.sleep(options['interval'])
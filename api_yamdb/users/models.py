@@ -2,6 +2,7 @@ from api.utils import username_validation
 from django.contrib.auth.models import AbstractUser
 
 from django.db import models
+from django.utils import timezone
 
 
 class Role(models.TextChoices):
@@ -60,3 +61,69 @@ class User(AbstractUser):
                 or self.is_superuser
                 or self.is_staff
                 )
+
+
+class EmailStatus(models.TextChoices):
+    """Состояния письма в очереди отправки"""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку"""
+
+    subject = models.CharField(
+        max_length=256,
+        verbose_name='Тема'
+    )
+    message = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(
+        max_length=254,
+        verbose_name='Отправитель'
+    )
+    recipient = models.EmailField(
+        max_length=254,
+        verbose_name='Получатель'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=EmailStatus.choices,
+        default=EmailStatus.PENDING,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки'
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    sent = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt'],
+                name='outbox_status_next_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
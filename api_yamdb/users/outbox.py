@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import EmailStatus, OutboxEmail
+
+
+def enqueue_email(subject, message, recipient_list, from_email=None):
+    """
+    Ставит письма в очередь. Вызывается внутри транзакции запроса,
+    поэтому письмо появляется в очереди только вместе с её данными.
+    """
+    return OutboxEmail.objects.bulk_create(
+        OutboxEmail(
+            subject=subject,
+            message=message,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipient=recipient,
+        )
+        for recipient in recipient_list
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повторной попыткой."""
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_DELAY))
+
+
+def claim_batch(batch_size, until):
+    """
+    Блокирует пачку писем, которым пора было уйти до момента until.
+    Параллельные воркеры пропускают чужие заблокированные строки и берут
+    следующие.
+    """
+    queryset = OutboxEmail.objects.filter(
+        status=EmailStatus.PENDING,
+        next_attempt__lt=until,
+    ).order_by('next_attempt', 'id')
+    if connection.features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True)
+    return list(queryset[:batch_size])
+
+
+def send_batch(emails, mail_connection):
+    """Отправляет письма через одно соединение, отмечая результат."""
+    now = timezone.now()
+    for email in emails:
+        try:
+            EmailMessage(
+                subject=email.subject,
+                body=email.message,
+                from_email=email.from_email,
+                to=[email.recipient],
+                connection=mail_connection,
+            ).send()
+        except Exception as error:
+            email.attempts += 1
+            email.last_error = str(error)
+            if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                email.status = EmailStatus.FAILED
+            else:
+                email.next_attempt = now + retry_delay(email.attempts)
+        else:
+            email.attempts += 1
+            email.status = EmailStatus.SENT
+            email.sent = now
+            email.last_error = ''
+    OutboxEmail.objects.bulk_update(
+        emails,
+        ('status', 'attempts', 'next_attempt', 'last_error', 'sent')
+    )
+
+
+def deliver_pending(batch_size=None, mail_connection=None):
+    """
+    Отправляет накопившиеся письма пачками, открывая одно соединение с
+    почтовым сервером на весь проход. Возвращает число обработанных писем.
+
+    Проход берёт только письма, срок которых наступил до его начала:
+    неудачная попытка переносит письмо не раньше этого момента, поэтому
+    каждое письмо пробуется за проход не больше одного раза, даже при
+    нулевой задержке повтора.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    mail_connection = mail_connection or get_connection()
+    started = timezone.now()
+    processed = 0
+    with mail_connection:
+        while True:
+            with transaction.atomic():
+                emails = claim_batch(batch_size, started)
+                if emails:
+                    send_batch(emails, mail_connection)
+            processed += len(emails)
+            if len(emails) < batch_size:
+                return processed
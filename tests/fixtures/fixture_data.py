@@ -0,0 +1,99 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.authentication import access_token_for, clear_local_role_states
+from reviews.models import Category, Genre, Review, Title
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    clear_local_role_states()
+
+
+@pytest.fixture
+def shared_cache(settings):
+    """
+    Тесты идут в одном процессе, поэтому локальный кэш ведёт себя как
+    общий: включаются режимы, которым нужен общий кэш.
+    """
+    settings.CACHE_SHARED = True
+    settings.JWT_STATELESS = True
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser',
+        email='testuser@yamdb.fake',
+        password='1234567'
+    )
+
+
+@pytest.fixture
+def another_user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUserAnother',
+        email='testuseranother@yamdb.fake',
+        password='1234567'
+    )
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin',
+        email='testadmin@yamdb.fake',
+        password='1234567',
+        role='admin'
+    )
+
+
+def _client_for(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}'
+    )
+    return client
+
+
+@pytest.fixture
+def user_client(user):
+    return _client_for(user)
+
+
+@pytest.fixture
+def admin_client_api(admin):
+    return _client_for(admin)
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genre():
+    return Genre.objects.create(name='Драма', slug='drama')
+
+
+@pytest.fixture
+def title(category, genre):
+    title = Title.objects.create(
+        name='Побег из Шоушенка',
+        year=1994,
+        category=category
+    )
+    title.genre.add(genre)
+    return title
+
+
+@pytest.fixture
+def review(title, user):
+    return Review.objects.create(
+        title=title,
+        author=user,
+        text='Отличный фильм',
+        score=9
+    )
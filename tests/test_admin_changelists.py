@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comments, Genre, GenreTitle, Review, Title
+
+
+def changelist_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+def add_rows(category, count, offset, django_user_model):
+    genre = Genre.objects.create(name=f'Жанр {offset}', slug=f'genre-{offset}')
+    for index in range(offset, offset + count):
+        author = django_user_model.objects.create_user(
+            username=f'author{index}', email=f'author{index}@yamdb.fake'
+        )
+        title = Title.objects.create(
+            name=f'Произведение {index}', year=2000, category=category
+        )
+        GenreTitle.objects.create(title=title, genre=genre)
+        review = Review.objects.create(
+            title=title, author=author, text='Текст', score=5
+        )
+        Comments.objects.create(review=review, author=author, text='Текст')
+
+
+@pytest.mark.django_db
+class TestAdminChangelists:
+
+    @pytest.mark.parametrize('model', [
+        'title', 'genretitle', 'review', 'comments'
+    ])
+    def test_query_count_does_not_depend_on_rows(
+            self, admin_client, category, django_user_model, model):
+        url = f'/admin/reviews/{model}/'
+        add_rows(category, 2, 0, django_user_model)
+        few = changelist_queries(admin_client, url)
+        add_rows(category, 8, 2, django_user_model)
+        many = changelist_queries(admin_client, url)
+
+        assert many == few, (
+            f'Число запросов списка {url} растёт с числом строк: '
+            f'{few} -> {many}'
+        )
+        assert many <= 8, f'Список {url} выполнил {many} SQL-запросов'
+
+    def test_search_by_author_username(
+            self, admin_client, category, django_user_model):
+        add_rows(category, 3, 0, django_user_model)
+        response = admin_client.get(
+            '/admin/reviews/review/', {'q': 'author1'}
+        )
+
+        assert response.status_code == 200
+        assert response.context['cl'].result_count == 1
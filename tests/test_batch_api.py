@@ -0,0 +1,103 @@
+import pytest
+
+from reviews.models import Genre, GenreTitle, Title
+
+from .utils import assert_max_queries
+
+BATCH_SIZE = 50
+
+
+@pytest.mark.django_db
+class TestTitleBatch:
+
+    def test_titles_created_in_batch(self, admin_client_api, category, genre):
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        items = [
+            {
+                'name': f'Произведение {index}',
+                'year': 2000,
+                'category': category.slug,
+                'genre': [genre.slug, comedy.slug],
+            }
+            for index in range(BATCH_SIZE)
+        ]
+        response = admin_client_api.post(
+            '/api/v1/titles/batch/', items, format='json'
+        )
+
+        assert response.status_code == 201, response.json()
+        ids = [result['id'] for result in response.json()]
+        assert Title.objects.filter(id__in=ids).count() == BATCH_SIZE
+        assert GenreTitle.objects.filter(title_id__in=ids).count() == (
+            2 * BATCH_SIZE
+        ), 'Проверьте, что связи с жанрами создаются для каждого элемента'
+
+    def test_invalid_items_reported_per_item(
+            self, admin_client_api, category, genre):
+        items = [
+            {'name': 'Верный', 'year': 2000,
+             'category': category.slug, 'genre': [genre.slug]},
+            {'name': 'Без категории', 'year': 2000,
+             'category': 'unknown', 'genre': [genre.slug]},
+            {'name': 'Из будущего', 'year': 3000,
+             'category': category.slug, 'genre': []},
+        ]
+        response = admin_client_api.post(
+            '/api/v1/titles/batch/', items, format='json'
+        )
+
+        assert response.status_code == 207
+        first, second, third = response.json()
+        assert 'id' in first
+        assert 'category' in second['errors']
+        assert 'year' in third['errors']
+        assert Title.objects.count() == 1, (
+            'Ошибочные элементы не должны создавать произведения'
+        )
+
+    def test_batch_requires_admin(self, user_client, category):
+        response = user_client.post(
+            '/api/v1/titles/batch/', [], format='json'
+        )
+        assert response.status_code == 403
+
+    def test_batch_query_count_does_not_grow(
+            self, admin_client_api, category, genre):
+        items = [
+            {'name': f'Произведение {index}', 'year': 2000,
+             'category': category.slug, 'genre': [genre.slug]}
+            for index in range(BATCH_SIZE)
+        ]
+        # На SQLite ключи из bulk_create не возвращаются, и произведения
+        # сохраняются по одному; проверяется бюджет остальных запросов.
+        assert_max_queries(
+            admin_client_api, '/api/v1/titles/batch/', BATCH_SIZE + 10,
+            method='post', data=items, format='json'
+        )
+
+
+@pytest.mark.django_db
+class TestGenreLinkBatch:
+
+    def test_genre_links(self, admin_client_api, title, genre):
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        items = [
+            {'title': title.id, 'genre': comedy.slug},
+            {'title': title.id, 'genre': genre.slug},
+            {'title': title.id, 'genre': comedy.slug},
+            {'title': title.id + 100, 'genre': comedy.slug},
+        ]
+        response = assert_max_queries(
+            admin_client_api, '/api/v1/titles/genre-links/', 8,
+            method='post', data=items, format='json'
+        )
+
+        assert response.status_code == 207
+        created, existing, repeated, missing = response.json()
+        assert created == {'created': True}
+        assert existing == {'created': False}, (
+            'Существующая связь не должна создаваться повторно'
+        )
+        assert repeated == {'created': False}
+        assert 'title' in missing['errors']
+        assert GenreTitle.objects.filter(title=title).count() == 2
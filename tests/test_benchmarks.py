@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+
+from api.benchmarks import SCENARIOS, compare, run_benchmarks
+from reviews.dataset import DatasetSize, seed_dataset
+from reviews.models import Category, Comments, Genre, Review, Title
+from users.models import User
+
+SIZE = DatasetSize(users=10, categories=2, genres=3, titles=5,
+                   reviews=20, comments=20)
+
+
+def result(p50=10.0, p95=20.0, queries=3.0):
+    return {'p50': p50, 'p95': p95, 'p99': p95, 'queries': queries,
+            'rps': 100.0, 'errors': 0}
+
+
+@pytest.mark.django_db
+class TestBenchmarks:
+
+    def test_seed_dataset(self):
+        created = seed_dataset(SIZE, seed=1)
+
+        assert (created['users'], created['titles'], created['review'],
+                created['comments']) == (10, 5, 20, 20)
+        assert Review.objects.count() == 20
+        assert Comments.objects.count() == 20
+        assert sum(Title.objects.values_list('review_count', flat=True)) == (
+            20
+        ), 'Проверьте, что рейтинги пересчитываются после загрузки'
+
+    def test_seed_is_reproducible(self):
+        def snapshot():
+            return list(Review.objects.order_by('pk').values_list(
+                'title_id', 'author_id', 'score'
+            ))
+
+        seed_dataset(SIZE, seed=1)
+        first = snapshot()
+        for model in (Review, Title, Category, Genre, User):
+            model.objects.all().delete()
+        seed_dataset(SIZE, seed=1)
+
+        assert snapshot() == first, (
+            'Одинаковый seed должен давать одинаковые данные'
+        )
+
+    def test_all_scenarios_run(self):
+        seed_dataset(SIZE, seed=1)
+        results = run_benchmarks(iterations=3, warmup=1)
+
+        assert set(results) == {scenario.name for scenario in SCENARIOS}
+        for name, measured in results.items():
+            assert measured['errors'] == 0, f'Сценарий {name} вернул ошибки'
+            assert measured['queries'] >= 0
+        assert results['titles-list-cached']['queries'] == 0, (
+            'Повторный запрос списка должен отдаваться из кэша'
+        )
+
+
+class TestBaselineComparison:
+
+    def baseline(self, vendor=None):
+        return {
+            'vendor': vendor or connection.vendor,
+            'scenarios': {'titles-list': result()},
+        }
+
+    def test_no_regressions(self):
+        assert compare(
+            {'titles-list': result(p50=11.0)}, self.baseline(), 0.25
+        ) == []
+
+    def test_query_growth_is_regression(self):
+        regressions = compare(
+            {'titles-list': result(queries=4.0)}, self.baseline(), 0.25
+        )
+        assert len(regressions) == 1
+        assert 'queries' in regressions[0]
+
+    def test_latency_growth_is_regression(self):
+        assert len(compare(
+            {'titles-list': result(p50=13.0, p95=30.0)},
+            self.baseline(), 0.25
+        )) == 2
+
+    def test_other_database_fails(self):
+        with pytest.raises(ValueError):
+            compare(
+                {'titles-list': result()},
+                self.baseline(vendor='other'), 0.25
+            )
@@ -0,0 +1,154 @@
+import pytest
+
+from reviews.importers import FILES, CsvImporter
+from reviews.models import Comments, Review, Title
+from reviews.ratings import rebuild_title_ratings
+
+from .utils import assert_max_queries
+
+REVIEW_SPEC = {spec.name: spec for spec in FILES}['review']
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('shared_cache')
+class TestConditionalRequests:
+
+    def test_not_modified_without_queries(self, client, title):
+        response = client.get('/api/v1/titles/')
+        etag = response['ETag']
+        assert response.has_header('Last-Modified')
+
+        response = assert_max_queries(
+            client, '/api/v1/titles/', 0, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 304, (
+            'Неизменившийся список должен отдаваться как 304 без запросов к БД'
+        )
+
+    def test_if_modified_since(self, client, category):
+        response = client.get('/api/v1/categories/')
+        response = client.get(
+            '/api/v1/categories/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == 304
+
+    def test_etag_changes_with_data(
+            self, client, title, django_capture_on_commit_callbacks):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        with django_capture_on_commit_callbacks(execute=True):
+            Title.objects.get(pk=title.pk).save()
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'После изменения произведения ETag должен смениться'
+        )
+        assert response['ETag'] != etag
+
+    def test_etag_depends_on_query(self, client, title):
+        first = client.get('/api/v1/titles/')['ETag']
+        second = client.get('/api/v1/titles/', {'limit': 1})['ETag']
+        assert first != second
+
+    def test_reviews_scoped_to_title(
+            self, client, title, review, another_user, category,
+            django_capture_on_commit_callbacks):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        other = Title.objects.create(name='Другое', year=2000,
+                                     category=category)
+        with django_capture_on_commit_callbacks(execute=True):
+            Review.objects.create(
+                title=other, author=another_user, text='Текст', score=3
+            )
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+            'Отзыв к другому произведению не должен менять ETag'
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Review.objects.create(
+                title=title, author=another_user, text='Текст', score=3
+            )
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_comments_change_etag(
+            self, client, title, review, user,
+            django_capture_on_commit_callbacks):
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        etag = client.get(url)['ETag']
+        with django_capture_on_commit_callbacks(execute=True):
+            Comments.objects.create(review=review, author=user, text='Текст')
+
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_author_rename_changes_etags(
+            self, client, title, review, admin_client_api,
+            django_capture_on_commit_callbacks):
+        reviews = f'/api/v1/titles/{title.id}/reviews/'
+        comments = f'{reviews}{review.id}/comments/'
+        etags = {url: client.get(url)['ETag'] for url in (reviews, comments)}
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client_api.patch(
+                f'/api/v1/users/{review.author.username}/',
+                {'username': 'Renamed'}
+            )
+        assert response.status_code == 200
+
+        for url, etag in etags.items():
+            assert client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            ).status_code == 200, (
+                f'После смены имени автора ETag {url} должен смениться'
+            )
+        assert client.get(reviews).json()['results'][0]['author'] == (
+            'Renamed'
+        )
+
+    def test_missing_parent_is_not_found(self, client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        Title.objects.filter(pk=title.pk).delete()
+
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 404, (
+            'Для удалённого произведения должен возвращаться 404, а не 304'
+        )
+
+    def test_bulk_import_changes_etags(
+            self, client, title, user, django_capture_on_commit_callbacks):
+        detail = f'/api/v1/titles/{title.id}/'
+        reviews = f'/api/v1/titles/{title.id}/reviews/'
+        etags = {url: client.get(url)['ETag'] for url in (detail, reviews)}
+        with django_capture_on_commit_callbacks(execute=True):
+            CsvImporter().import_rows(REVIEW_SPEC, iter([{
+                'id': '1', 'title_id': str(title.id), 'text': 'Текст',
+                'author': str(user.id), 'score': '7',
+                'pub_date': '2019-09-24T21:08:21.567Z',
+            }]))
+
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                f'После массовой загрузки ETag {url} должен смениться'
+            )
+        assert response.json()['results'][0]['score'] == 7
+
+    def test_rating_rebuild_changes_etag(
+            self, client, title, review, django_capture_on_commit_callbacks):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        with django_capture_on_commit_callbacks(execute=True):
+            rebuild_title_ratings()
+
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_no_validators_without_shared_cache(client, title):
+    response = client.get('/api/v1/titles/')
+
+    assert response.status_code == 200
+    assert not response.has_header('ETag'), (
+        'Без общего кэша поколения не согласованы между воркерами, '
+        'и валидаторы не выдаются'
+    )
@@ -0,0 +1,300 @@
+import csv
+
+import pytest
+
+from api.cache import get_generation
+from reviews.importers import (FILES, CsvImporter, CsvPartImporter,
+                               dependencies, read_range, split_file)
+from reviews.models import (Comments, GenreTitle, ImportCheckpoint, Review,
+                            Title, TitleRanking)
+
+INVALIDATED = ('titles', 'categories', 'genres', 'category_slugs',
+               'genre_slugs')
+
+CSV_DATA = {
+    'users': (
+        ('id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'),
+        (100, 'bingobongo', 'bingobongo@yamdb.fake', 'user', '', '', ''),
+        (101, 'capt_obvious', 'capt_obvious@yamdb.fake', 'admin', '', '', ''),
+    ),
+    'category': (
+        ('id', 'name', 'slug'),
+        (1, 'Фильм', 'movie'),
+    ),
+    'genre': (
+        ('id', 'name', 'slug'),
+        (1, 'Драма', 'drama'),
+        (2, 'Комедия', 'comedy'),
+    ),
+    'titles': (
+        ('id', 'name', 'year', 'category'),
+        (1, 'Побег из Шоушенка', 1994, 1),
+        (2, 'Крестный отец', 1972, 1),
+        (3, 'Без категории', 1972, 99),
+    ),
+    'genre_title': (
+        ('id', 'title_id', 'genre_id'),
+        (1, 1, 1),
+        (2, 2, 1),
+        (3, 2, 2),
+    ),
+    'review': (
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        (1, 1, 'Отлично', 100, 10, '2019-09-24T21:08:21.567Z'),
+        (2, 1, 'Хорошо', 101, 8, '2019-09-25T21:08:21.567Z'),
+        (3, 3, 'Нет произведения', 100, 1, '2019-09-25T21:08:21.567Z'),
+    ),
+    'comments': (
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        (1, 1, 'Согласен', 101, '2019-09-26T21:08:21.567Z'),
+    ),
+}
+
+
+@pytest.fixture
+def csv_files(tmp_path):
+    specs = []
+    for spec in FILES:
+        path = tmp_path / f'{spec.name}.csv'
+        with open(path, 'w', encoding='utf-8', newline='') as csvfile:
+            csv.writer(csvfile).writerows(CSV_DATA[spec.name])
+        specs.append(spec._replace(path=path))
+    return specs
+
+
+@pytest.mark.django_db
+class TestCsvImport:
+
+    def test_import_all(self, csv_files):
+        results = list(CsvImporter(batch_size=2).import_all(csv_files))
+
+        assert [result.rows for result in results] == [2, 1, 2, 3, 3, 3, 1]
+        assert Title.objects.count() == 2, (
+            'Проверьте, что строки с несуществующими внешними ключами пропускаются'
+        )
+        assert GenreTitle.objects.count() == 3, (
+            'Проверьте, что связи жанров и произведений загружаются'
+        )
+        assert Comments.objects.get().review_id == 1
+
+    def test_import_preserves_pub_date_and_rating(self, csv_files):
+        list(CsvImporter().import_all(csv_files))
+
+        assert Review.objects.get(id=1).pub_date.year == 2019, (
+            'Проверьте, что дата публикации берётся из файла'
+        )
+        title = Title.objects.get(id=1)
+        assert (title.review_count, title.rating) == (2, 9)
+
+    def test_import_is_idempotent(self, csv_files):
+        list(CsvImporter().import_all(csv_files))
+        list(CsvImporter().import_all(csv_files))
+
+        assert Review.objects.count() == 2
+        assert Title.objects.get(id=1).review_count == 2
+
+    def test_import_invalidates_caches(
+            self, csv_files, django_capture_on_commit_callbacks):
+        before = {resource: get_generation(resource)
+                  for resource in INVALIDATED}
+        with django_capture_on_commit_callbacks(execute=True):
+            list(CsvImporter().import_all(csv_files))
+
+        for resource in INVALIDATED:
+            assert get_generation(resource) != before[resource], (
+                f'Проверьте, что загрузка сдвигает поколение `{resource}`'
+            )
+        assert TitleRanking.objects.get().title_id == 1, (
+            'Проверьте, что после загрузки отзывов обновляются рейтинги'
+        )
+
+
+class TestImportScheduling:
+
+    def test_dependencies(self):
+        graph = dependencies(FILES)
+
+        assert graph['users'] == graph['category'] == graph['genre'] == set()
+        assert graph['titles'] == {'category'}
+        assert graph['genre_title'] == {'titles', 'genre'}
+        assert graph['review'] == {'titles', 'users'}
+        assert graph['comments'] == {'review', 'users'}, (
+            'Проверьте, что граф зависимостей строится по внешним ключам'
+        )
+
+    def test_parts_cover_all_rows(self, tmp_path):
+        path = tmp_path / 'review.csv'
+        rows = [(index, f'Отзыв\nв "две" строки {index}') for index in range(10)]
+        with open(path, 'w', encoding='utf-8', newline='') as csvfile:
+            csv.writer(csvfile).writerows([('id', 'text'), *rows])
+        parts = []
+        with open(path, 'rb') as csvfile:
+            for start, end in split_file(path, 3):
+                parts.append([
+                    (int(row[0]), row[1])
+                    for row in csv.reader(read_range(csvfile, start, end))
+                ])
+
+        assert sorted(sum(parts, [])) == rows, (
+            'Проверьте, что части делят файл по границам записей'
+        )
+        assert all(parts), 'Проверьте, что каждая часть получает строки'
+
+
+@pytest.mark.django_db
+class TestSplitImport:
+
+    def test_split_review_import(self, csv_files):
+        importer = CsvImporter()
+        for spec in csv_files[:-2]:
+            importer.import_file(spec)
+        review_spec = csv_files[-2]
+        for part in split_file(review_spec.path, 2):
+            CsvPartImporter().import_file(
+                review_spec, part=part, finalize=False
+            )
+        importer.finalize(review_spec)
+
+        assert Review.objects.count() == 2
+        assert Title.objects.get(id=1).review_count == 2
+
+
+def append_rows(path, rows, newline=True):
+    with open(path, 'a', encoding='utf-8', newline='') as csvfile:
+        csv.writer(csvfile).writerows(rows)
+    if not newline:
+        with open(path, 'rb+') as csvfile:
+            csvfile.seek(-2, 2)
+            csvfile.truncate()
+
+
+@pytest.mark.django_db
+class TestIncrementalImport:
+
+    def test_only_appended_rows_loaded(self, csv_files):
+        importer = CsvImporter(incremental=True)
+        list(importer.import_all(csv_files))
+        review_spec = csv_files[-2]
+        append_rows(review_spec.path, [
+            (4, 2, 'Новый отзыв', 100, 6, '2019-09-27T21:08:21.567Z'),
+        ])
+        result = importer.import_file(review_spec)
+
+        assert result.rows == 1, (
+            'Проверьте, что при инкрементальной загрузке читаются только новые строки'
+        )
+        assert Title.objects.get(id=2).review_count == 1
+        checkpoint = ImportCheckpoint.objects.get(name='review')
+        assert checkpoint.offset == review_spec.path.stat().st_size
+        assert checkpoint.rows == 4
+
+    def test_appended_rows_invalidate_caches(
+            self, csv_files, django_capture_on_commit_callbacks):
+        importer = CsvImporter(incremental=True)
+        list(importer.import_all(csv_files))
+        genre_spec = csv_files[2]
+        append_rows(genre_spec.path, [(3, 'Ужасы', 'horror')])
+        before = get_generation('genre_slugs')
+        with django_capture_on_commit_callbacks(execute=True):
+            importer.import_file(genre_spec)
+
+        assert get_generation('genre_slugs') != before, (
+            'Проверьте, что инкрементальная загрузка сбрасывает словарь слагов'
+        )
+
+    def test_unfinished_line_is_not_loaded(self, csv_files):
+        importer = CsvImporter(incremental=True)
+        list(importer.import_all(csv_files))
+        review_spec = csv_files[-2]
+        append_rows(review_spec.path, [
+            (4, 2, 'Недописанный', 100, 6, '2019-09-27T21:08:21.567Z'),
+        ], newline=False)
+
+        assert importer.import_file(review_spec).rows == 0
+
+    def test_rewritten_file_reloaded(self, csv_files):
+        importer = CsvImporter(incremental=True)
+        category_spec = csv_files[1]
+        importer.import_file(category_spec)
+        with open(category_spec.path, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerows((('id', 'name', 'slug'), (2, 'Книга', 'book')))
+
+        assert importer.import_file(category_spec).rows == 1
+        assert ImportCheckpoint.objects.get(name='category').rows == 1
+
+    def test_resume_after_interruption(self, csv_files, monkeypatch):
+        importer = CsvImporter(batch_size=1, incremental=True)
+        for spec in csv_files[:3]:
+            importer.import_file(spec)
+        titles_spec = csv_files[3]
+        original = CsvImporter.insert_chunk
+        calls = []
+
+        def failing_insert(self, spec, chunk):
+            calls.append(chunk)
+            if len(calls) == 2:
+                raise RuntimeError('Обрыв соединения')
+            return original(self, spec, chunk)
+
+        monkeypatch.setattr(CsvImporter, 'insert_chunk', failing_insert)
+        with pytest.raises(RuntimeError):
+            importer.import_file(titles_spec)
+        monkeypatch.setattr(CsvImporter, 'insert_chunk', original)
+
+        assert ImportCheckpoint.objects.get(name='titles').rows == 1
+        assert importer.import_file(titles_spec).rows == 2, (
+            'Проверьте, что прерванная загрузка продолжается с последней пачки'
+        )
+        assert Title.objects.count() == 2
+
+    def test_resumed_review_import_rebuilds_ratings(
+            self, csv_files, monkeypatch):
+        importer = CsvImporter(batch_size=1, incremental=True)
+        for spec in csv_files[:5]:
+            importer.import_file(spec)
+        review_spec = csv_files[5]
+        original = CsvImporter.insert_chunk
+        calls = []
+
+        def failing_insert(self, spec, chunk):
+            calls.append(chunk)
+            if len(calls) == 3:
+                raise RuntimeError('Обрыв соединения')
+            return original(self, spec, chunk)
+
+        monkeypatch.setattr(CsvImporter, 'insert_chunk', failing_insert)
+        with pytest.raises(RuntimeError):
+            importer.import_file(review_spec)
+        monkeypatch.setattr(CsvImporter, 'insert_chunk', original)
+        importer.import_file(review_spec)
+
+        title = Title.objects.get(id=1)
+        assert title.review_count == 2, (
+            'Проверьте, что продолженная загрузка пересчитывает рейтинги '
+            'произведений из пачек, загруженных до обрыва'
+        )
+        assert title.rating == 9
+
+    def test_interrupted_finalize_runs_on_resume(
+            self, csv_files, monkeypatch):
+        importer = CsvImporter(incremental=True)
+        for spec in csv_files[:5]:
+            importer.import_file(spec)
+        review_spec = csv_files[5]
+
+        def failing_finalize(self, spec, title_ids=None):
+            raise RuntimeError('Обрыв соединения')
+
+        with monkeypatch.context() as patch:
+            patch.setattr(CsvImporter, 'finalize', failing_finalize)
+            with pytest.raises(RuntimeError):
+                importer.import_file(review_spec)
+
+        assert importer.import_file(review_spec).rows == 0
+        assert Title.objects.get(id=1).review_count == 2, (
+            'Проверьте, что незавершённая загрузка завершается при '
+            'следующем запуске, даже если новых строк нет'
+        )
+        assert not ImportCheckpoint.objects.get(
+            name='review'
+        ).finalize_pending
@@ -0,0 +1,125 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.pagination import PubDateCursorPagination
+
+from reviews.models import Review
+
+from .utils import encode_cursor
+
+
+@pytest.fixture
+def reviews(title, django_user_model):
+    return [
+        Review.objects.create(
+            title=title,
+            author=django_user_model.objects.create_user(
+                username=f'reviewer{index}', email=f'reviewer{index}@yamdb.fake'
+            ),
+            text=f'Отзыв {index}',
+            score=5
+        )
+        for index in range(12)
+    ]
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_limit_offset_is_default(self, client, title, reviews):
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+
+        assert response.json()['count'] == 12
+
+    def test_cursor_pages_walk_all_reviews(self, client, title, reviews):
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor&limit=5'
+        received = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                data = client.get(url).json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме общее количество не считается'
+            )
+            assert not any(
+                'COUNT(' in query['sql'] for query in context.captured_queries
+            )
+            received.extend(item['id'] for item in data['results'])
+            url = data['next']
+
+        expected = [
+            review.id for review in sorted(
+                reviews, key=lambda review: (review.pub_date, review.id),
+                reverse=True
+            )
+        ]
+        assert received == expected, (
+            'Проверьте, что курсорная пагинация отдаёт отзывы без пропусков '
+            'и повторов в порядке (-pub_date, -id)'
+        )
+
+    def test_equal_pub_dates_use_id_tiebreaker(self, client, title, reviews):
+        Review.objects.update(pub_date=reviews[0].pub_date)
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor&limit=5'
+        pages = []
+        while url:
+            data = client.get(url).json()
+            pages.append(data)
+            url = data['next']
+        received = [item['id'] for page in pages for item in page['results']]
+
+        assert received == sorted((review.id for review in reviews), reverse=True), (
+            'Проверьте, что при совпадающих pub_date записи упорядочены по id'
+        )
+        previous = client.get(pages[1]['previous']).json()
+        assert previous['results'] == pages[0]['results'], (
+            'Проверьте, что ссылка previous возвращает предыдущую страницу'
+        )
+
+    def test_cursor_comments(self, client, title, review, user):
+        review.comments.create(author=user, text='Комментарий')
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            '?pagination=cursor'
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 1
+
+    @pytest.mark.parametrize('position', (
+        ['garbage', 1], ['2020-01-01T00:00:00+00:00', 'x'], [None, 1],
+        [[1], {}], 'garbage',
+    ))
+    def test_invalid_cursor_values(self, client, title, reviews, position):
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'cursor': encode_cursor(position)}
+        )
+
+        assert response.status_code == 404, (
+            'Проверьте, что курсор с неподходящими значениями даёт 404'
+        )
+
+    def test_invalid_comments_cursor(self, client, title, review):
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            {'cursor': encode_cursor(['garbage', 1])}
+        )
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('reverse, bound', ((False, '<='), (True, '>=')))
+    def test_leading_column_bound(self, title, reviews, reverse, bound):
+        paginator = PubDateCursorPagination()
+        queryset = Review.objects.filter(title=title)
+        position = paginator._get_position_from_instance(
+            reviews[5], paginator.ordering
+        )
+        sql = str(queryset.filter(
+            paginator.keyset_condition(queryset, position, reverse)
+        ).query)
+
+        assert f'"reviews_review"."pub_date" {bound} ' in sql, (
+            'Проверьте, что условие курсора ограничивает первое поле '
+            'сортировки, чтобы БД сканировала диапазон индекса'
+        )
@@ -0,0 +1,104 @@
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.models import EmailStatus, OutboxEmail
+from users.outbox import deliver_pending, enqueue_email
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise SMTPException('Сервер недоступен')
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def test_signup_enqueues_email(self, client):
+        response = client.post(
+            '/api/v1/auth/signup/',
+            data={'username': 'newuser', 'email': 'newuser@yamdb.fake'}
+        )
+
+        assert response.status_code == 200
+        assert not mail.outbox, (
+            'Регистрация не должна отправлять письмо внутри запроса'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.recipient == 'newuser@yamdb.fake'
+        assert email.status == EmailStatus.PENDING
+
+    def test_signup_without_outbox_sends_directly(self, client, settings):
+        settings.EMAIL_OUTBOX = False
+        client.post(
+            '/api/v1/auth/signup/',
+            data={'username': 'newuser', 'email': 'newuser@yamdb.fake'}
+        )
+
+        assert len(mail.outbox) == 1
+        assert not OutboxEmail.objects.exists()
+
+    def test_deliver_pending_in_batches(self):
+        enqueue_email('Тема', 'Текст', [
+            f'user{index}@yamdb.fake' for index in range(5)
+        ])
+
+        assert deliver_pending(batch_size=2) == 5
+        assert len(mail.outbox) == 5, 'Все письма из очереди должны уйти'
+        assert not OutboxEmail.objects.exclude(
+            status=EmailStatus.SENT
+        ).exists()
+        assert deliver_pending() == 0, (
+            'Отправленные письма не должны отправляться повторно'
+        )
+
+    def test_failed_delivery_is_retried_with_backoff(self, settings):
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        enqueue_email('Тема', 'Текст', ['user@yamdb.fake'])
+
+        deliver_pending(mail_connection=FailingBackend())
+        email = OutboxEmail.objects.get()
+        assert email.status == EmailStatus.PENDING
+        assert email.attempts == 1
+        assert email.next_attempt > timezone.now(), (
+            'Повторная попытка должна откладываться'
+        )
+        assert 'Сервер недоступен' in email.last_error
+
+        assert deliver_pending(mail_connection=FailingBackend()) == 0, (
+            'Письмо не должно отправляться раньше времени повтора'
+        )
+        OutboxEmail.objects.update(next_attempt=timezone.now())
+        deliver_pending(mail_connection=FailingBackend())
+        email.refresh_from_db()
+        assert email.status == EmailStatus.FAILED, (
+            'После исчерпания попыток письмо помечается неотправленным'
+        )
+
+    def test_send_emails_command(self):
+        enqueue_email('Тема', 'Текст', ['user@yamdb.fake'])
+
+        call_command('send_emails')
+
+        assert len(mail.outbox) == 1
+        assert OutboxEmail.objects.get().sent is not None
+
+    def test_failing_batch_is_tried_once_per_pass(self, settings):
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 0
+        enqueue_email('Тема', 'Текст', [
+            f'user{index}@yamdb.fake' for index in range(4)
+        ])
+
+        assert deliver_pending(
+            batch_size=2, mail_connection=FailingBackend()
+        ) == 4, 'Проход должен завершиться, даже если письма не уходят'
+        assert set(
+            OutboxEmail.objects.values_list('attempts', flat=True)
+        ) == {1}, 'За один проход каждое письмо пробуется один раз'
+        assert not OutboxEmail.objects.exclude(
+            status=EmailStatus.PENDING
+        ).exists()
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+
+from reviews.bulk import bulk_changed
+from reviews.dataset import DatasetSize, allocate, seed_dataset
+from reviews.importers import FILES
+from reviews.models import Comments, GenreTitle, Review, Title
+from users.models import User
+
+SIZE = DatasetSize(users=30, categories=3, genres=4, titles=20,
+                   reviews=200, comments=50)
+
+
+@pytest.mark.django_db
+class TestGenerateDataset:
+
+    def test_sizes(self):
+        call_command('generate_dataset', *(
+            f'--{field}={value}' for field, value in SIZE._asdict().items()
+        ))
+
+        assert User.objects.count() == 30
+        assert Title.objects.count() == 20
+        assert Review.objects.count() == 200
+        assert Comments.objects.count() == 50
+        assert not Title.objects.annotate(
+            genres=Count('genre')
+        ).filter(genres=0).exists(), 'У каждого произведения есть жанр'
+
+    def test_one_review_per_author(self):
+        seed_dataset(SIZE, seed=2)
+
+        assert not Review.objects.values('title', 'author').annotate(
+            reviews=Count('id')
+        ).filter(reviews__gt=1).exists(), (
+            'Проверьте, что автор оставляет не больше одного отзыва '
+            'на произведение'
+        )
+
+    def test_ratings_rebuilt(self):
+        seed_dataset(SIZE, seed=2)
+
+        assert sum(Title.objects.values_list('review_count', flat=True)) == (
+            200
+        ), 'Сигналы при массовой загрузке не отправляются'
+
+    def test_popularity_is_skewed(self):
+        seed_dataset(SIZE, seed=2, skew=1.5)
+        counts = sorted(
+            Title.objects.values_list('review_count', flat=True),
+            reverse=True
+        )
+
+        assert counts[0] > 3 * counts[len(counts) // 2], (
+            'Отзывы должны концентрироваться на популярных произведениях'
+        )
+
+    def test_appends_to_existing_data(self, review):
+        seed_dataset(SIZE, seed=2)
+
+        assert Review.objects.count() == 201
+        assert GenreTitle.objects.count() > 1
+
+    def test_generations_bumped_at_end(
+            self, django_capture_on_commit_callbacks):
+        senders = []
+
+        def receiver(sender, **kwargs):
+            senders.append(sender)
+
+        bulk_changed.connect(receiver)
+        try:
+            with django_capture_on_commit_callbacks(execute=True):
+                call_command('generate_dataset', *(
+                    f'--{field}={value}'
+                    for field, value in SIZE._asdict().items()
+                ))
+        finally:
+            bulk_changed.disconnect(receiver)
+
+        models = [spec.model for spec in FILES]
+        assert senders[-len(models):] == models, (
+            'Проверьте, что после загрузки набора кэши сбрасываются '
+            'по всем его моделям'
+        )
+
+    def test_impossible_size(self):
+        with pytest.raises(CommandError):
+            call_command('generate_dataset', '--users=2', '--titles=2',
+                         '--reviews=5')
+
+
+def test_allocate_respects_cap():
+    counts = allocate(50, 10, 6, skew=2.0, rng=random.Random(0))
+
+    assert sum(counts) == 50
+    assert max(counts) <= 6
@@ -0,0 +1,135 @@
+import pytest
+from django.db import connection
+
+from api.cache import get_cache
+from api.metrics import (SLOTS_KEY, WORKER_KEY, QueryTracker, collect,
+                         publish, record_queries, registry)
+from reviews.models import Title
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def metric_lines(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain')
+    return response.content.decode().splitlines()
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_request_recorded_by_route(self, client, settings, title):
+        settings.METRICS_SAMPLE_RATE = 1
+        client.get('/api/v1/titles/')
+        lines = metric_lines(client)
+
+        assert 'yamdb_request_seconds_count{route="api:titles-list"} 1' in (
+            lines
+        ), 'Проверьте, что время запроса учитывается по имени маршрута'
+        assert 'yamdb_response_bytes_count{route="api:titles-list"} 1' in lines
+        assert 'yamdb_render_seconds_count{route="api:titles-list"} 1' in lines
+        assert (
+            'yamdb_serialize_seconds_count{route="api:titles-list"} 1'
+            in lines
+        ), 'Проверьте, что построение данных сериализатором засекается'
+        assert 'yamdb_db_queries_count{route="api:titles-list"} 1' in lines
+        assert not any('route="metrics"' in line for line in lines), (
+            'Запросы к /metrics не должны попадать в метрики'
+        )
+
+    def test_buckets_are_cumulative(self, client, settings, title):
+        settings.METRICS_SAMPLE_RATE = 1
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        prefix = 'yamdb_db_queries_bucket{route="api:titles-list"'
+        buckets = [
+            line for line in metric_lines(client) if line.startswith(prefix)
+        ]
+
+        assert buckets[-1].endswith('le="+Inf"} 2')
+        counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+        assert counts == sorted(counts)
+
+    def test_queries_recorded_only_for_sampled_requests(
+            self, client, settings, title):
+        settings.METRICS_SAMPLE_RATE = 0
+        client.get('/api/v1/titles/')
+        lines = metric_lines(client)
+
+        assert 'yamdb_request_seconds_count{route="api:titles-list"} 1' in (
+            lines
+        )
+        assert not any(
+            line.startswith('yamdb_db_queries_count') for line in lines
+        ), 'SQL должен учитываться только у выбранных запросов'
+
+    def test_metrics_disabled(self, client, settings, title):
+        settings.METRICS_ENABLED = False
+        client.get('/api/v1/titles/')
+
+        assert not any('api:titles-list' in line
+                       for line in metric_lines(client))
+
+    def test_duplicate_queries_flagged(self, title):
+        tracker = QueryTracker()
+        with connection.execute_wrapper(tracker):
+            for _ in range(3):
+                list(Title.objects.filter(pk=title.pk))
+        record_queries('api:titles-detail', tracker)
+        _, counters = collect()
+
+        assert tracker.count == 3
+        assert counters[
+            ('duplicate_query_requests_total', 'api:titles-detail')
+        ] == 1, 'Проверьте, что повторяющийся SQL отмечается как N+1'
+
+
+def other_worker(requests):
+    """Снимок другого воркера в следующем свободном слоте."""
+    cache = get_cache()
+    cache.add(SLOTS_KEY, 0, timeout=None)
+    cache.set(WORKER_KEY.format(slot=cache.incr(SLOTS_KEY)), {
+        'histograms': {},
+        'counters': {
+            ('duplicate_query_requests_total', 'api:other'): requests
+        },
+    })
+
+
+class TestWorkerSnapshots:
+
+    def test_workers_summed_with_shared_cache(self, shared_cache):
+        registry.increment('duplicate_query_requests_total', 'api:other')
+        publish(force=True)
+        other_worker(2)
+        _, counters = collect()
+
+        assert counters[('duplicate_query_requests_total', 'api:other')] == (
+            3
+        ), 'Проверьте, что /metrics суммирует снимки всех воркеров'
+
+    def test_slot_reissued_after_cache_reset(self, shared_cache):
+        publish(force=True)
+        get_cache().clear()
+        other_worker(2)
+        registry.increment('duplicate_query_requests_total', 'api:other')
+        _, counters = collect()
+
+        assert counters[('duplicate_query_requests_total', 'api:other')] == (
+            3
+        ), 'Снимок воркера не должен затирать чужой слот после сброса кэша'
+
+    def test_local_metrics_without_shared_cache(self):
+        other_worker(2)
+        registry.increment('duplicate_query_requests_total', 'api:other')
+        _, counters = collect()
+
+        assert counters[('duplicate_query_requests_total', 'api:other')] == (
+            1
+        ), 'Без общего кэша /metrics отдаёт метрики своего процесса'
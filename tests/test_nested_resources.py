@@ -0,0 +1,44 @@
+import pytest
+
+from reviews.models import Comments, Title
+
+
+@pytest.fixture
+def other_title(category):
+    return Title.objects.create(name='Другое', year=2000, category=category)
+
+
+@pytest.fixture
+def comment(review, user):
+    return Comments.objects.create(review=review, author=user, text='Текст')
+
+
+@pytest.mark.django_db
+class TestNestedResources:
+
+    def test_comments_under_foreign_title(
+            self, client, user_client, other_title, review, comment):
+        url = f'/api/v1/titles/{other_title.id}/reviews/{review.id}/comments/'
+
+        assert client.get(url).status_code == 404, (
+            'Список комментариев отзыва чужого произведения должен '
+            'возвращать 404'
+        )
+        assert client.get(f'{url}{comment.id}/').status_code == 404, (
+            'Комментарий отзыва чужого произведения должен возвращать 404'
+        )
+        response = user_client.post(url, data={'text': 'Текст'})
+        assert response.status_code == 404, (
+            'Нельзя комментировать отзыв через чужое произведение'
+        )
+        assert Comments.objects.count() == 1
+
+    def test_reviews_of_missing_title(self, client, user_client, review):
+        url = f'/api/v1/titles/{review.title_id + 100}/reviews/'
+
+        assert client.get(url).status_code == 404
+        assert client.get(f'{url}{review.id}/').status_code == 404, (
+            'Отзыв должен искаться только среди отзывов произведения из URL'
+        )
+        response = user_client.post(url, data={'text': 'Текст', 'score': 5})
+        assert response.status_code == 404
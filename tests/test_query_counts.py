@@ -0,0 +1,90 @@
+import pytest
+
+from reviews.models import Comments, Genre, Review, Title
+
+from .utils import assert_max_queries
+
+PAGE_SIZE = 10
+
+
+@pytest.fixture
+def catalogue(category, genre, user, django_user_model):
+    """Полная страница произведений с жанрами, отзывами и комментариями."""
+    second_genre = Genre.objects.create(name='Комедия', slug='comedy')
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'author{index}', email=f'author{index}@yamdb.fake'
+        )
+        for index in range(PAGE_SIZE)
+    ]
+    titles = []
+    for index in range(PAGE_SIZE):
+        title = Title.objects.create(
+            name=f'Произведение {index}', year=2000, category=category
+        )
+        title.genre.add(genre, second_genre)
+        titles.append(title)
+    first = titles[0]
+    for author in authors:
+        review = Review.objects.create(
+            title=first, author=author, text='Текст', score=5
+        )
+        Comments.objects.create(review=review, author=user, text='Текст')
+    return first, review
+
+
+@pytest.mark.django_db
+class TestQueryCounts:
+
+    def test_titles_list(self, client, catalogue):
+        assert_max_queries(client, '/api/v1/titles/', 3)
+
+    def test_titles_list_filtered(self, client, catalogue):
+        assert_max_queries(
+            client, '/api/v1/titles/?genre=drama&category=movie', 3
+        )
+
+    def test_title_detail(self, client, catalogue):
+        title, _ = catalogue
+        assert_max_queries(client, f'/api/v1/titles/{title.id}/', 2)
+
+    def test_categories_list(self, client, catalogue):
+        assert_max_queries(client, '/api/v1/categories/', 2)
+
+    def test_genres_list(self, client, catalogue):
+        assert_max_queries(client, '/api/v1/genres/', 2)
+
+    def test_reviews_list(self, client, catalogue):
+        title, _ = catalogue
+        assert_max_queries(client, f'/api/v1/titles/{title.id}/reviews/', 3)
+
+    def test_comments_list(self, client, catalogue):
+        title, review = catalogue
+        assert_max_queries(
+            client,
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            3
+        )
+
+    def test_comment_detail(self, client, catalogue):
+        title, review = catalogue
+        comment = review.comments.get()
+        assert_max_queries(
+            client,
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            f'{comment.id}/',
+            1
+        )
+
+    def test_comment_create(self, user_client, catalogue):
+        title, review = catalogue
+        response = assert_max_queries(
+            user_client,
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            3,
+            method='post',
+            data={'text': 'Новый комментарий'}
+        )
+        assert response.status_code == 201, (
+            'Комментарий должен создаваться'
+        )
@@ -0,0 +1,195 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reviews.models import (Category, Genre, GenreRanking, GenreTitle,
+                            Review, Title, TitleRanking)
+from reviews.rankings import refresh_rankings
+
+from .utils import assert_max_queries
+
+
+@pytest.fixture
+def rated_titles(title, user, another_user, category, genre):
+    """Три произведения: высокий рейтинг, свежие отзывы, другой жанр."""
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    book = Category.objects.create(name='Книга', slug='book')
+    fresh = Title.objects.create(name='Свежий', year=2020, category=category)
+    fresh.genre.add(genre)
+    other = Title.objects.create(name='Другой', year=2001, category=book)
+    other.genre.add(comedy)
+    Review.objects.create(title=title, author=user, text='a', score=10)
+    Review.objects.create(title=fresh, author=user, text='b', score=6)
+    Review.objects.create(title=fresh, author=another_user, text='c', score=7)
+    Review.objects.create(title=other, author=user, text='d', score=8)
+    Review.objects.filter(title=title).update(
+        pub_date=timezone.now() - timedelta(days=30)
+    )
+    Title.objects.create(name='Без отзывов', year=2000, category=category)
+    refresh_rankings()
+    return title, fresh, other
+
+
+def ids(response):
+    return [item['id'] for item in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestRankingRefresh:
+
+    def test_only_rated_titles_are_ranked(self, rated_titles):
+        assert TitleRanking.objects.count() == 3, (
+            'В рейтинг должны попадать только произведения с отзывами'
+        )
+        assert GenreRanking.objects.count() == 3
+
+    def test_ranking_rows(self, rated_titles):
+        title, fresh, _ = rated_titles
+        old = TitleRanking.objects.get(title=title)
+        recent = TitleRanking.objects.get(title=fresh)
+
+        assert (old.rating, old.review_count, old.recent_reviews) == (
+            10, 1, 0
+        ), 'Проверьте, что отзывы вне окна не считаются свежими'
+        assert old.trending == 0
+        assert (recent.rating, recent.recent_reviews) == (6.5, 2)
+        assert recent.trending == pytest.approx(1.3, rel=1e-3), (
+            'Популярность — сумма оценок/10 с затуханием по возрасту'
+        )
+
+    def test_trending_decays_with_age(self, rated_titles):
+        _, fresh, _ = rated_titles
+        refresh_rankings(now=timezone.now() + timedelta(hours=48))
+
+        assert TitleRanking.objects.get(
+            title=fresh
+        ).trending == pytest.approx(0.65, rel=1e-3), (
+            'Вес отзыва должен уменьшаться вдвое за период полураспада'
+        )
+
+    def test_unchanged_rows_not_rewritten(self, rated_titles):
+        now = timezone.now()
+        refresh_rankings(now=now)
+        with CaptureQueriesContext(connection) as context:
+            refresh_rankings(now=now)
+
+        assert not [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE'))
+        ], 'Проверьте, что обновление перезаписывает только изменившиеся строки'
+
+    def test_genre_rows_follow_changes(self, rated_titles, another_user):
+        title, fresh, _ = rated_titles
+        fresh.genre.clear()
+        Review.objects.create(
+            title=title, author=another_user, text='e', score=2
+        )
+        refresh_rankings()
+
+        assert not GenreRanking.objects.filter(title=fresh).exists()
+        assert GenreRanking.objects.get(title=title).review_count == 2, (
+            'Проверьте, что строки жанров обновляются вслед за произведением'
+        )
+
+    def test_refresh_replaces_rows(self, rated_titles):
+        title, _, _ = rated_titles
+        Review.objects.filter(title=title).delete()
+        call_command('refresh_rankings')
+
+        assert not TitleRanking.objects.filter(title=title).exists()
+        assert TitleRanking.objects.count() == 2
+
+
+@pytest.mark.django_db
+class TestRankingApi:
+
+    def test_top_rated(self, client, rated_titles):
+        title, fresh, other = rated_titles
+        response = client.get('/api/v1/rankings/')
+
+        assert response.status_code == 200
+        assert ids(response) == [title.id, other.id, fresh.id]
+
+    def test_trending_and_most_reviewed(self, client, rated_titles):
+        _, fresh, other = rated_titles
+
+        assert ids(client.get('/api/v1/rankings/?order=trending'))[:2] == [
+            fresh.id, other.id
+        ]
+        assert ids(client.get('/api/v1/rankings/?order=reviews'))[0] == (
+            fresh.id
+        )
+
+    def test_filters(self, client, rated_titles):
+        title, fresh, other = rated_titles
+
+        assert ids(client.get('/api/v1/rankings/?genre=drama')) == [
+            title.id, fresh.id
+        ]
+        assert ids(client.get('/api/v1/rankings/?category=book')) == [
+            other.id
+        ]
+        assert ids(client.get(
+            '/api/v1/rankings/?genre=drama&category=book'
+        )) == []
+
+    def test_invalid_parameters(self, client, rated_titles):
+        assert client.get(
+            '/api/v1/rankings/?order=random'
+        ).status_code == 400
+        assert client.get(
+            '/api/v1/rankings/?genre=unknown'
+        ).status_code == 400
+
+    def test_bulk_created_genre(self, client, rated_titles):
+        _, fresh, _ = rated_titles
+        client.get('/api/v1/rankings/?genre=drama')
+        Genre.objects.bulk_create([Genre(id=100, name='Массовый', slug='bulk')])
+        GenreTitle.objects.bulk_create([GenreTitle(title=fresh, genre_id=100)])
+        refresh_rankings()
+
+        response = client.get('/api/v1/rankings/?genre=bulk')
+        assert response.status_code == 200, (
+            'Слаг, которого ещё нет в словаре, проверяется по БД'
+        )
+        assert ids(response) == [fresh.id]
+
+    @pytest.mark.usefixtures('shared_cache')
+    def test_refresh_changes_etag(
+            self, client, rated_titles, django_capture_on_commit_callbacks):
+        etag = client.get('/api/v1/rankings/')['ETag']
+        with django_capture_on_commit_callbacks(execute=True):
+            refresh_rankings()
+
+        assert client.get(
+            '/api/v1/rankings/', HTTP_IF_NONE_MATCH=etag
+        ).status_code == 200, 'После обновления рейтингов ETag меняется'
+
+    def test_cursor_pages(self, client, rated_titles):
+        title, fresh, other = rated_titles
+        first = client.get('/api/v1/rankings/?limit=2')
+        second = client.get(first.json()['next'])
+
+        assert ids(first) + ids(second) == [title.id, other.id, fresh.id]
+        assert second.json()['next'] is None
+
+    def test_page_query_count(self, client, rated_titles):
+        # Первый запрос загружает словарь слагов в память процесса,
+        # дальше страница читается одним запросом по индексу.
+        client.get('/api/v1/rankings/?genre=drama')
+        response = assert_max_queries(
+            client, '/api/v1/rankings/?genre=drama&order=trending', 1
+        )
+        assert response.json()['results'][0] == {
+            'id': rated_titles[1].id,
+            'name': 'Свежий',
+            'year': 2020,
+            'rating': 6.5,
+            'review_count': 2,
+            'recent_reviews': 2,
+            'trending': pytest.approx(1.3, rel=1e-3),
+        }
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from api.cache import GENERATION_KEY, bump_generation, get_cache
+from api.middleware import ReplicaRoutingMiddleware
+from api.mixins import read_primary_after_change
+from api.routers import replica_reads
+from reviews.models import Title
+
+
+def read_alias(status=200):
+    """Middleware, чьё представление возвращает базу для чтения."""
+    def view(request):
+        return HttpResponse(router.db_for_read(Title), status=status)
+    return ReplicaRoutingMiddleware(view)
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica1']
+
+
+class TestReplicaRouting:
+
+    def test_safe_request_reads_from_replica(self, replicas):
+        response = read_alias()(RequestFactory().get('/api/v1/titles/'))
+        assert response.content == b'replica1', (
+            'GET-запросы должны читать с реплики'
+        )
+
+    def test_writes_and_unsafe_requests_use_primary(self, replicas):
+        response = read_alias()(RequestFactory().post('/api/v1/titles/'))
+        assert response.content == b'default', (
+            'Чтение внутри запроса на запись должно идти с основной базы'
+        )
+        assert router.db_for_write(Title) == 'default'
+
+    def test_write_makes_client_sticky(self, replicas, settings):
+        response = read_alias()(RequestFactory().post('/api/v1/titles/'))
+        cookie = response.cookies[settings.DATABASE_STICKY_COOKIE]
+        assert cookie['max-age'] == settings.DATABASE_STICKY_SECONDS
+
+        request = RequestFactory().get('/api/v1/titles/')
+        request.COOKIES[settings.DATABASE_STICKY_COOKIE] = cookie.value
+        assert read_alias()(request).content == b'default', (
+            'После записи клиент должен читать свои изменения с основной базы'
+        )
+
+    def test_failed_write_is_not_sticky(self, replicas, settings):
+        response = read_alias(status=400)(
+            RequestFactory().post('/api/v1/titles/')
+        )
+        assert settings.DATABASE_STICKY_COOKIE not in response.cookies
+
+    def test_read_primary_header(self, replicas):
+        request = RequestFactory().get(
+            '/api/v1/titles/', HTTP_X_READ_PRIMARY='1'
+        )
+        assert read_alias()(request).content == b'default'
+
+    def test_reads_outside_requests_use_primary(self, replicas):
+        assert router.db_for_read(Title) == 'default', (
+            'Команды и воркеры должны читать с основной базы'
+        )
+
+    def test_without_replicas_everything_uses_primary(self):
+        response = read_alias()(RequestFactory().get('/api/v1/titles/'))
+        assert response.content == b'default'
+
+    def test_recent_change_reads_primary(self, replicas):
+        bump_generation('titles')
+        with replica_reads(True), read_primary_after_change(('titles',)):
+            assert router.db_for_read(Title) == 'default', (
+                'Сразу после записи кэш и валидаторы заполняются с основной '
+                'базы, а не с отстающей реплики'
+            )
+
+    def test_settled_change_reads_replica(self, replicas, settings):
+        get_cache().set(
+            GENERATION_KEY.format(resource='titles'),
+            time.time_ns() - (settings.DATABASE_STICKY_SECONDS + 1) * 10 ** 9,
+            timeout=None
+        )
+        with replica_reads(True), read_primary_after_change(('titles',)):
+            assert router.db_for_read(Title) == 'replica1'
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures('shared_cache')
+    def test_list_after_change_reads_primary(self, replicas, client, title):
+        bump_generation('titles')
+        assert client.get('/api/v1/titles/').status_code == 200
+        assert client.get(f'/api/v1/titles/{title.id}/').status_code == 200
@@ -0,0 +1,72 @@
+import pytest
+
+from reviews.models import Review, Title
+
+from .utils import assert_max_queries
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_repeated_list_served_from_cache(self, client, title):
+        first = client.get('/api/v1/titles/')
+        second = assert_max_queries(client, '/api/v1/titles/', 0)
+
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный запрос списка отдаётся из кэша'
+        )
+        assert second.json() == first.json()
+
+    def test_query_string_normalized(self, client, title):
+        client.get('/api/v1/titles/?year=1994&name=Побег')
+        response = client.get('/api/v1/titles/?name=Побег&year=1994')
+
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что порядок параметров не влияет на ключ кэша'
+        )
+        assert client.get('/api/v1/titles/?year=2000')['X-Cache'] == 'MISS'
+
+    def test_title_change_invalidates_list(
+            self, client, title, django_capture_on_commit_callbacks):
+        client.get('/api/v1/titles/')
+        with django_capture_on_commit_callbacks(execute=True):
+            Title.objects.create(
+                name='Новое', year=2000, category=title.category
+            )
+        response = client.get('/api/v1/titles/')
+
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 2, (
+            'Проверьте, что после изменения произведений кэш сбрасывается'
+        )
+
+    def test_review_invalidates_titles_rating(
+            self, client, title, user, django_capture_on_commit_callbacks):
+        client.get('/api/v1/titles/')
+        with django_capture_on_commit_callbacks(execute=True):
+            Review.objects.create(title=title, author=user, text='a', score=7)
+
+        assert client.get('/api/v1/titles/').json()['results'][0]['rating'] == 7
+
+    def test_genre_change_keeps_categories_cached(
+            self, client, title, genre, django_capture_on_commit_callbacks):
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/genres/')
+        with django_capture_on_commit_callbacks(execute=True):
+            genre.name = 'Триллер'
+            genre.save()
+
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'HIT'
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'MISS'
+
+    def test_cache_stats(self, client, admin_client_api, title):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        response = admin_client_api.get('/api/v1/cache/stats/')
+
+        assert response.status_code == 200
+        assert response.json()['titles'] == {'hits': 1, 'misses': 1}
+
+    def test_cache_stats_admin_only(self, user_client):
+        assert user_client.get('/api/v1/cache/stats/').status_code == 403
@@ -0,0 +1,44 @@
+import pytest
+
+from reviews.models import Review
+
+from .utils import assert_max_queries
+
+
+@pytest.mark.django_db
+class TestReviewCreate:
+
+    def url(self, title):
+        return f'/api/v1/titles/{title.id}/reviews/'
+
+    @pytest.mark.usefixtures('shared_cache')
+    def test_create_query_budget(self, user_client, title):
+        user_client.get('/api/v1/users/me/')
+        # Произведение, SAVEPOINT, вставка отзыва, обновление рейтинга,
+        # RELEASE SAVEPOINT.
+        response = assert_max_queries(
+            user_client, self.url(title), 5,
+            method='post', data={'text': 'Отзыв', 'score': 7}
+        )
+        assert response.status_code == 201, response.json()
+
+    def test_second_review_rejected(self, user_client, title, review):
+        response = user_client.post(
+            self.url(title), data={'text': 'Ещё отзыв', 'score': 1}
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Можно оставлять только один отзыв!']
+        }
+        assert Review.objects.filter(title=title).count() == 1
+        title.refresh_from_db()
+        assert title.review_count == 1, (
+            'Отклонённый отзыв не должен менять рейтинг'
+        )
+
+    def test_author_can_edit_own_review(self, user_client, title, review):
+        response = user_client.patch(
+            f'{self.url(title)}{review.id}/', data={'score': 2}
+        )
+        assert response.status_code == 200
@@ -0,0 +1,86 @@
+import pytest
+from django.db import connection
+
+from reviews.models import Review, Title
+
+from .utils import encode_cursor
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    @pytest.fixture
+    def documents(self, title, user, another_user, category):
+        Title.objects.create(
+            name='Крестный отец', year=1972, category=category,
+            description='Сага о семье Корлеоне'
+        )
+        Review.objects.create(title=title, author=user, text='Надежда и свобода', score=10)
+        Review.objects.create(title=title, author=another_user, text='Скучно', score=3)
+
+    def test_search_titles(self, client, documents):
+        response = client.get('/api/v1/search/', {'q': 'Корлеоне'})
+
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [item['name'] for item in results] == ['Крестный отец'], (
+            'Проверьте, что поиск произведений идёт по названию и описанию'
+        )
+        assert 'genre' in results[0] and 'category' in results[0]
+
+    def test_search_reviews(self, client, documents, title):
+        response = client.get(
+            '/api/v1/search/', {'q': 'свобода', 'type': 'reviews'}
+        )
+
+        results = response.json()['results']
+        assert len(results) == 1
+        assert results[0]['title'] == title.id
+        assert results[0]['author'] == 'TestUser'
+
+    def test_empty_query(self, client, documents):
+        assert client.get('/api/v1/search/').json()['results'] == []
+
+    def test_unknown_type(self, client):
+        assert client.get('/api/v1/search/?q=a&type=users').status_code == 400
+
+    def test_search_pagination(self, client, title, category):
+        for index in range(3):
+            Title.objects.create(name=f'Серия {index}', year=2000, category=category)
+        first = client.get('/api/v1/search/', {'q': 'Серия', 'limit': 2}).json()
+        second = client.get(first['next']).json()
+
+        names = [item['name'] for item in first['results'] + second['results']]
+        assert sorted(names) == ['Серия 0', 'Серия 1', 'Серия 2']
+        assert second['next'] is None
+
+    def test_invalid_cursor(self, client, documents):
+        response = client.get('/api/v1/search/', {
+            'q': 'Корлеоне', 'cursor': encode_cursor(['garbage', 1])
+        })
+
+        assert response.status_code == 404, (
+            'Проверьте, что курсор с неподходящим рангом даёт 404'
+        )
+
+    @pytest.mark.skipif(
+        connection.vendor != 'postgresql',
+        reason='ts_rank есть только в Postgres'
+    )
+    def test_tied_ranks_across_pages(self, client, category):
+        titles = [
+            Title.objects.create(
+                name='Крестный отец', year=1972, category=category,
+                description='Сага о семье Корлеоне'
+            )
+            for _ in range(5)
+        ]
+        url, received = '/api/v1/search/?q=Корлеоне&limit=2', []
+        while url:
+            data = client.get(url).json()
+            received.extend(item['id'] for item in data['results'])
+            url = data['next']
+
+        assert received == sorted(
+            (title.id for title in titles), reverse=True
+        ), 'Проверьте, что равные ранги не теряются на границе страниц'
@@ -0,0 +1,93 @@
+import pytest
+
+from reviews.models import Genre, Title
+
+from .utils import assert_max_queries
+
+GENRES = 5
+
+
+@pytest.fixture
+def genres():
+    return [
+        Genre.objects.create(name=f'Жанр {index}', slug=f'genre-{index}')
+        for index in range(GENRES)
+    ]
+
+
+def title_data(category, genre_slugs):
+    return {
+        'name': 'Новое произведение',
+        'year': 2000,
+        'category': category.slug,
+        'genre': genre_slugs,
+    }
+
+
+@pytest.mark.django_db
+class TestSlugCache:
+
+    @pytest.mark.usefixtures('shared_cache')
+    def test_create_does_not_query_each_slug(
+            self, admin_client_api, category, genres):
+        data = title_data(category, [genre.slug for genre in genres])
+        admin_client_api.post('/api/v1/titles/', data, format='json')
+
+        # Словари слагов уже в памяти: запросы идут только на вставку
+        # произведения, запись связей через genre.set() и чтение жанров
+        # для ответа, без запроса на каждый слаг.
+        response = assert_max_queries(
+            admin_client_api, '/api/v1/titles/', 5,
+            method='post', data=data, format='json'
+        )
+        assert response.status_code == 201, response.json()
+        title = Title.objects.get(pk=response.json()['id'])
+        assert title.genre.count() == GENRES
+        assert title.category_id == category.id
+
+    def test_unknown_slugs_listed_in_one_error(
+            self, admin_client_api, category, genres):
+        data = title_data(category, [genres[0].slug, 'missing', 'absent'])
+        response = admin_client_api.post(
+            '/api/v1/titles/', data, format='json'
+        )
+
+        assert response.status_code == 400
+        errors = response.json()['genre']
+        assert len(errors) == 1, 'Все неизвестные слаги — в одной ошибке'
+        assert 'missing' in errors[0] and 'absent' in errors[0]
+
+    def test_unknown_category(self, admin_client_api, genres):
+        data = {'name': 'Без категории', 'year': 2000,
+                'category': 'missing', 'genre': [genres[0].slug]}
+        response = admin_client_api.post(
+            '/api/v1/titles/', data, format='json'
+        )
+        assert response.status_code == 400
+        assert 'category' in response.json()
+
+    def test_new_and_deleted_genres_seen(
+            self, admin_client_api, category, genres,
+            django_capture_on_commit_callbacks):
+        admin_client_api.post(
+            '/api/v1/titles/', title_data(category, [genres[0].slug]),
+            format='json'
+        )
+        Genre.objects.bulk_create([Genre(name='Новый', slug='fresh')])
+        response = admin_client_api.post(
+            '/api/v1/titles/', title_data(category, ['fresh']),
+            format='json'
+        )
+        assert response.status_code == 201, (
+            'Слаг, созданный без сигналов, должен находиться по БД'
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Genre.objects.filter(slug=genres[1].slug).delete()
+        response = admin_client_api.post(
+            '/api/v1/titles/', title_data(category, [genres[1].slug]),
+            format='json'
+        )
+        assert response.status_code == 400, (
+            'Удалённый жанр не должен оставаться в словаре слагов'
+        )
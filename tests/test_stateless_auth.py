@@ -0,0 +1,130 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.authentication import (ROLE_CLAIMS, access_token_for,
+                                invalidate_role_state)
+from users.models import User
+
+
+def client_with(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def user_queries(queries):
+    table = User._meta.db_table
+    return [query for query in queries if table in query['sql']]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('shared_cache')
+class TestStatelessAuth:
+
+    def test_token_contains_role_claims(self, admin):
+        token = access_token_for(admin)
+        for claim in ROLE_CLAIMS:
+            assert token[claim] == getattr(admin, claim), (
+                f'Токен должен содержать утверждение `{claim}`'
+            )
+
+    def test_repeated_requests_skip_user_lookup(
+            self, admin_client_api, category):
+        url = f'/api/v1/categories/{category.slug}/'
+        admin_client_api.get('/api/v1/users/me/')
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client_api.delete(url)
+
+        assert response.status_code == 204, (
+            'Администратор с токеном без состояния должен удалять категории'
+        )
+        assert not user_queries(context.captured_queries), (
+            'Повторный запрос не должен загружать пользователя из БД'
+        )
+
+    def test_user_loaded_without_stateless_mode(
+            self, admin_client_api, category, settings):
+        settings.JWT_STATELESS = False
+        admin_client_api.get('/api/v1/users/me/')
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client_api.delete(
+                f'/api/v1/categories/{category.slug}/'
+            )
+
+        assert response.status_code == 204
+        assert user_queries(context.captured_queries), (
+            'Без режима без состояния пользователь загружается из БД'
+        )
+
+    def test_demoted_admin_token_rejected(self, admin, category):
+        client = client_with(access_token_for(admin))
+        admin.role = 'user'
+        admin.save()
+        invalidate_role_state(admin.pk)
+
+        response = client.delete(f'/api/v1/categories/{category.slug}/')
+
+        assert response.status_code == 401, (
+            'Токен с устаревшей ролью должен отклоняться'
+        )
+
+    def test_inactive_user_token_rejected(self, user):
+        client = client_with(access_token_for(user))
+        user.is_active = False
+        user.save()
+        invalidate_role_state(user.pk)
+
+        response = client.get('/api/v1/users/me/')
+
+        assert response.status_code == 401, (
+            'Токен заблокированного пользователя должен отклоняться'
+        )
+
+    def test_legacy_token_still_accepted(self, user):
+        client = client_with(RefreshToken.for_user(user).access_token)
+
+        response = client.get('/api/v1/users/me/')
+
+        assert response.status_code == 200, (
+            'Токены без утверждений о роли должны проверяться по БД'
+        )
+        assert response.json()['username'] == user.username
+
+    def test_author_and_moderator_permissions(
+            self, user_client, review, django_user_model):
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        response = user_client.patch(url, {'text': 'Изменённый текст'})
+        assert response.status_code == 200, (
+            'Автор должен иметь возможность изменить свой отзыв'
+        )
+
+        moderator = django_user_model.objects.create_user(
+            username='TestModerator', email='moderator@yamdb.fake',
+            role='moderator'
+        )
+        response = client_with(access_token_for(moderator)).delete(url)
+        assert response.status_code == 204, (
+            'Модератор должен иметь возможность удалить чужой отзыв'
+        )
+
+    def test_created_review_uses_current_username(self, user, title):
+        client = client_with(access_token_for(user))
+        user.username = 'Renamed'
+        user.save()
+        invalidate_role_state(user.pk)
+
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'text': 'Текст', 'score': 5}
+        )
+
+        assert response.status_code == 201
+        assert response.json()['author'] == 'Renamed', (
+            'Проверьте, что автор нового отзыва выводится под текущим '
+            'именем, а не под именем из старого токена'
+        )
@@ -0,0 +1,33 @@
+import pytest
+
+from reviews.models import Genre, Title
+
+
+@pytest.mark.django_db
+class TestTitleFilters:
+
+    @pytest.fixture
+    def titles(self, title, category):
+        other = Title.objects.create(name='Другое', year=2001, category=category)
+        other.genre.add(Genre.objects.create(name='Мелодрама', slug='melodrama'))
+        return title, other
+
+    def names(self, client, query):
+        response = client.get(f'/api/v1/titles/?{query}')
+        assert response.status_code == 200
+        return {item['name'] for item in response.json()['results']}
+
+    def test_substring_genre_filter(self, client, titles):
+        assert self.names(client, 'genre=drama') == {'Побег из Шоушенка', 'Другое'}
+
+    def test_exact_genre_filter(self, client, titles):
+        assert self.names(client, 'genre_slug=drama') == {'Побег из Шоушенка'}, (
+            'Проверьте, что genre_slug фильтрует по точному совпадению slug'
+        )
+
+    def test_exact_category_filter(self, client, titles):
+        assert len(self.names(client, 'category_slug=movie')) == 2
+        assert self.names(client, 'category_slug=mov') == set()
+
+    def test_name_and_year_filters(self, client, titles):
+        assert self.names(client, 'name=Побег&year=1994') == {'Побег из Шоушенка'}
@@ -0,0 +1,144 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+from reviews.ratings import rebuild_title_ratings, score_percentile
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_updated_on_review_create(self, title, user, another_user):
+        Review.objects.create(title=title, author=user, text='a', score=9)
+        Review.objects.create(title=title, author=another_user, text='b', score=4)
+        title.refresh_from_db()
+
+        assert title.review_count == 2, 'Проверьте, что количество отзывов хранится в произведении'
+        assert title.rating_sum == 13, 'Проверьте, что сумма оценок хранится в произведении'
+        assert title.rating == 6.5, 'Проверьте, что рейтинг пересчитывается при создании отзыва'
+
+    def test_rating_updated_on_review_update(self, title, review):
+        review.score = 3
+        review.save()
+        title.refresh_from_db()
+
+        assert title.review_count == 1
+        assert title.rating == 3, 'Проверьте, что рейтинг пересчитывается при изменении оценки'
+
+    def test_rating_reset_on_review_delete(self, title, review):
+        review.delete()
+        title.refresh_from_db()
+
+        assert title.review_count == 0
+        assert title.rating_sum == 0
+        assert title.rating is None, 'Проверьте, что рейтинг сбрасывается после удаления всех отзывов'
+
+    def test_rating_updated_on_author_delete(self, title, review, user):
+        user.delete()
+        title.refresh_from_db()
+
+        assert title.review_count == 0, (
+            'Проверьте, что каскадное удаление отзывов обновляет рейтинг'
+        )
+
+    def test_recalculate_ratings_command(self, title, review):
+        Title.objects.update(rating_sum=0, review_count=0, rating=None)
+        call_command('recalculate_ratings')
+        title.refresh_from_db()
+
+        assert (title.rating_sum, title.review_count, title.rating) == (9, 1, 9), (
+            'Проверьте, что команда recalculate_ratings восстанавливает счётчики'
+        )
+
+    def test_rebuild_aggregates_once(self, title, review, category):
+        empty = Title.objects.create(
+            name='Без отзывов', year=2000, category=category
+        )
+        Title.objects.update(rating_sum=7, review_count=3, rating=1, score_9=0)
+        with CaptureQueriesContext(connection) as context:
+            assert rebuild_title_ratings() == 2
+        title.refresh_from_db()
+        empty.refresh_from_db()
+
+        assert len(context.captured_queries) == 2, (
+            'Проверьте, что рейтинги пересчитываются одним агрегатом по '
+            'отзывам, а не подзапросами на каждое произведение'
+        )
+        assert (title.rating_sum, title.review_count, title.rating,
+                title.score_9) == (9, 1, 9, 1)
+        assert (empty.rating_sum, empty.review_count, empty.rating) == (
+            0, 0, None
+        )
+
+    def test_titles_list_returns_stored_rating(self, client, title, review):
+        response = client.get('/api/v1/titles/')
+
+        assert response.status_code == 200
+        assert response.json()['results'][0]['rating'] == 9
+
+
+@pytest.mark.django_db
+class TestTitleScoreStats:
+
+    def test_histogram_follows_reviews(self, title, review, another_user):
+        other = Review.objects.create(
+            title=title, author=another_user, text='b', score=4
+        )
+        review.score = 4
+        review.save()
+        title.refresh_from_db()
+        assert title.score_histogram[9] == 0, (
+            'Проверьте, что изменение оценки снимает старую оценку'
+        )
+        assert title.score_histogram[4] == 2
+
+        other.delete()
+        title.refresh_from_db()
+        assert title.score_histogram[4] == 1, (
+            'Проверьте, что удаление отзыва уменьшает счётчик его оценки'
+        )
+        assert sum(title.score_histogram.values()) == title.review_count
+
+    def test_recalculate_restores_histogram(self, title, review):
+        Title.objects.update(score_9=0, score_1=5)
+        call_command('recalculate_ratings')
+        title.refresh_from_db()
+
+        assert title.score_9 == 1 and title.score_1 == 0, (
+            'Проверьте, что recalculate_ratings пересчитывает гистограмму'
+        )
+
+    def test_score_percentile(self):
+        histogram = {score: 0 for score in range(1, 11)}
+        histogram.update({2: 1, 5: 2, 10: 1})
+
+        assert score_percentile(histogram, 0.5) == 5
+        assert score_percentile(histogram, 0.25) == 2
+        assert score_percentile(histogram, 0.9) == 10
+        assert score_percentile(dict.fromkeys(histogram, 0), 0.5) is None
+
+    def test_stats_endpoint(self, client, title, review, another_user):
+        Review.objects.create(
+            title=title, author=another_user, text='b', score=5
+        )
+        response = client.get(f'/api/v1/titles/{title.id}/stats/')
+
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats['count'] == 2
+        assert stats['median'] == 5
+        assert stats['distribution']['9'] == 1
+        assert stats['percentiles']['p90'] == 9
+
+    def test_stats_embedded_on_request(self, client, title, review):
+        plain = client.get(f'/api/v1/titles/{title.id}/').json()
+        embedded = client.get(
+            f'/api/v1/titles/{title.id}/', {'include': 'stats'}
+        ).json()
+
+        assert 'stats' not in plain, (
+            'Статистика должна выводиться только по ?include=stats'
+        )
+        assert embedded['stats']['median'] == 9
@@ -0,0 +1,27 @@
+import json
+from base64 import b64encode
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def assert_max_queries(client, url, max_queries, method='get', **kwargs):
+    """
+    Выполняет запрос к эндпоинту и проверяет, что число SQL-запросов
+    не превышает закреплённого бюджета. Возвращает ответ.
+    """
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, **kwargs)
+    executed = len(context.captured_queries)
+    queries = '\n'.join(query['sql'] for query in context.captured_queries)
+    assert executed <= max_queries, (
+        f'Запрос {method.upper()} {url} выполнил {executed} SQL-запросов, '
+        f'допустимо не больше {max_queries}:\n{queries}'
+    )
+    return response
+
+
+def encode_cursor(position):
+    """Курсор в формате DRF с произвольными значениями позиции."""
+    return b64encode(urlencode({'p': json.dumps(position)}).encode()).decode()